@@ -47,6 +47,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'classify_resume.middleware.CurrentResumeMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -64,6 +65,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'classify_resume.context_processors.current_resume',
             ],
         },
     },
@@ -140,6 +142,68 @@ STATICFILES_FINDERS = (
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 HOST_BASED_PATH = '127.0.0.1:8000'
+TALENT_INDEX_DIR = os.path.join(BASE_DIR, 'talent_index')
+# approximate nearest-neighbour index over the hashed resume vectors (manage.py build_ann_index)
+ANN_INDEX_DIR = os.path.join(BASE_DIR, 'ann_index')
+ANN_TREES = 16
+ANN_LEAF_SIZE = 32
+ANN_PROJECTION_DIM = 128
+# leaf candidates collected per query, and how many per requested result are re-ranked on the full vectors
+ANN_SEARCH_K = 2000
+ANN_RERANK_FACTOR = 10
+# 'postings' (exact MaxScore over the talent index) or 'ann'
+TALENT_SEARCH_ENGINE = 'postings'
+# upper bound on the ?k= of the talent search page
+TALENT_SEARCH_MAX_K = 200
+
+# stages applied to the words of every job and resume vector: 'stopwords', 'stem', 'bigrams';
+# run rebuild_term_vectors after changing it
+TOKEN_PIPELINE = ['stopwords', 'stem']
+# applicant ranking: 'cosine' (raw term counts), 'hashed' (cosine over feature-hashed vectors), 'tfidf', 'bm25'
+# or 'multifield'
+RESUME_SCORER = 'cosine'
+# width of the float32 feature-hashed vectors, stored ones of another width are re-hashed on read
+HASHED_VECTOR_DIMENSION = 2 ** 12
+BM25_K1 = 1.2
+BM25_B = 0.75
+# per-section weights of the multifield scorer
+RESUME_SECTION_WEIGHTS = {
+    'experience': 0.6,
+    'skills': 0.2,
+    'education': 0.1,
+    'certificates': 0.1,
+}
+# listings are paged with a cursor on (sort key, id), never with OFFSET
+JOBS_PER_PAGE = 24
+APPLICANTS_PER_PAGE = 25
+# job search: FTS5 bm25 ranking with the title weighted above the description, of every match or of the newest
+# JOB_SEARCH_CANDIDATES when a query matches more (the results then say so); results shown and words per snippet
+JOB_SEARCH_CANDIDATES = 500
+JOB_SEARCH_LIMIT = 48
+JOB_SEARCH_MAX_TERMS = 8
+JOB_SEARCH_TITLE_WEIGHT = 4.0
+JOB_SEARCH_SNIPPET_WORDS = 16
+# upper bounds of the admin salary histogram buckets, a job can override them with its own salary_buckets
+SALARY_HISTOGRAM_BOUNDS = [50000, 100000, 150000, 200000]
+SALARY_HISTOGRAM_CACHE_TIMEOUT = 60 * 60
+# near-duplicate resumes: MinHash signature length, LSH bands (rows per band = permutations / bands) and the
+# estimated Jaccard similarity two resumes need to be put in one cluster
+MINHASH_PERMUTATIONS = 128
+MINHASH_BANDS = 16
+NEAR_DUPLICATE_THRESHOLD = 0.8
+# background tasks run by manage.py runworker; eager runs them in the request once it commits (development, tests)
+TASK_QUEUE_EAGER = False
+TASK_MAX_ATTEMPTS = 5
+# seconds a claimed task stays hidden from other workers, and the first retry delay (doubled on every attempt)
+TASK_VISIBILITY_TIMEOUT = 5 * 60
+TASK_RETRY_DELAY = 30
+TASK_POLL_INTERVAL = 2
+JOB_FEED_SIZE = 100
+# ranked jobs kept beyond the feed, so closed or edited ones can be replaced without scoring every job again
+JOB_FEED_RESERVE = 100
+JOB_FEED_CACHE_TIMEOUT = 60 * 60
+# the logged in user's resume behind request.resume, dropped whenever the user's resumes change; 0 disables the cache
+CURRENT_RESUME_CACHE_TIMEOUT = 60
 RESET_PASSWORD = 'RESET PASSWORD URL'
 
 
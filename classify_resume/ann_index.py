@@ -0,0 +1,293 @@
+import heapq
+import json
+import os
+import time
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from classify_resume.models import ResumeTermVector
+from classify_resume.pipeline import pipeline_stamp
+from classify_resume.scoring import hashed_matrix, stored_hashed_vector
+
+# random-projection forest: the feature-hashed resume vectors are first reduced with a fixed Gaussian projection
+# (Johnson-Lindenstrauss), every tree then splits the projected points by the hyperplane halfway between two random
+# points until a leaf holds ANN_LEAF_SIZE resumes. Queries collect candidates from the closest leaves of all trees and
+# re-rank them exactly with the stored hashed vectors.
+META_FILE = 'meta.json'
+IDS_FILE = 'ids.npy'
+PROJECTIONS_FILE = 'projections.npy'
+TREES_FILE = 'trees.npz'
+PENDING_FILE = 'pending.log'
+PROJECTION_SEED = 4242
+
+_loaded_index = None
+
+
+def index_dir():
+    return settings.ANN_INDEX_DIR
+
+
+def projection_matrix(dimension, projected):
+    generator = np.random.RandomState(PROJECTION_SEED)
+    return (generator.standard_normal((dimension, projected)) / np.sqrt(projected)).astype(np.float32)
+
+
+def build_tree(points, leaf_size, generator):
+    # nodes are stored as parallel arrays, a negative child -n - 1 points at leaf n
+    normals, offsets, children = [], [], []
+    leaf_of = np.zeros(len(points), dtype=np.int32)
+    leaves = 0
+    stack = [(np.arange(len(points)), None, 0)]
+    while stack:
+        positions, parent, side = stack.pop()
+        right = None
+        if len(positions) > leaf_size:
+            first, second = points[generator.choice(positions, 2, replace=False)]
+            normal = first - second
+            if not normal.any():
+                normal = generator.standard_normal(points.shape[1]).astype(np.float32)
+            projected = points[positions] @ normal
+            offset = np.float32(normal @ (first + second) / 2)
+            right = projected > offset
+            if right.all() or not right.any():
+                # skewed pick: the middle of the projected range separates any two distinct points
+                offset = np.float32((projected.min() + projected.max()) / 2)
+                right = projected > offset
+        if right is None or right.all() or not right.any():
+            # small enough, or identical points no plane can separate: one (possibly oversized) leaf
+            child = -leaves - 1
+            leaf_of[positions] = leaves
+            leaves += 1
+        else:
+            child = len(normals)
+            normals.append(normal)
+            offsets.append(offset)
+            children.append([0, 0])
+            stack.append((positions[~right], child, 0))
+            stack.append((positions[right], child, 1))
+        if parent is not None:
+            children[parent][side] = child
+    dimension = points.shape[1]
+    return {
+        'normals': np.array(normals, dtype=np.float32).reshape(-1, dimension),
+        'offsets': np.array(offsets, dtype=np.float32),
+        'children': np.array(children, dtype=np.int32).reshape(-1, 2),
+        'leaf_of': leaf_of,
+    }
+
+
+def descend(tree, point):
+    if not len(tree['children']):
+        return 0
+    node = 0
+    while True:
+        child = tree['children'][node][int(point @ tree['normals'][node] > tree['offsets'][node])]
+        if child < 0:
+            return int(-child - 1)
+        node = child
+
+
+def project_vectors(vectors, projection):
+    ids = []
+    rows = []
+    for vector in vectors:
+        if vector.norm:
+            ids.append(vector.resume_id)
+            rows.append(stored_hashed_vector(vector) @ projection)
+    return ids, rows
+
+
+def read_index(directory, mmap_mode=None):
+    with open(os.path.join(directory, META_FILE)) as meta_file:
+        meta = json.load(meta_file)
+    ids = np.load(os.path.join(directory, IDS_FILE))
+    projections = np.load(os.path.join(directory, PROJECTIONS_FILE), mmap_mode=mmap_mode)
+    with np.load(os.path.join(directory, TREES_FILE)) as arrays:
+        projection = arrays['projection']
+        trees = [
+            {name: arrays[f'{name}_{number}'] for name in ('normals', 'offsets', 'children', 'leaf_of')}
+            for number in range(meta['trees'])
+        ]
+    return meta, ids, projections, projection, trees
+
+
+def write_index(directory, built_at, ids, projections, projection, trees):
+    os.makedirs(directory, exist_ok=True)
+    arrays = {'projection': projection}
+    for number, tree in enumerate(trees):
+        arrays.update({f'{name}_{number}': values for name, values in tree.items()})
+    for name, write in ((IDS_FILE, lambda path: np.save(path, ids)),
+                        (PROJECTIONS_FILE, lambda path: np.save(path, projections)),
+                        (TREES_FILE, lambda path: np.savez(path, **arrays))):
+        path = os.path.join(directory, name)
+        with open(path + '.tmp', 'wb') as data_file:
+            write(data_file)
+        os.replace(path + '.tmp', path)
+    meta = {
+        'built_at': built_at.isoformat(),
+        'trees': len(trees),
+        'dimension': int(projection.shape[0]),
+        'projected': int(projection.shape[1]),
+        'pipeline': pipeline_stamp(),
+    }
+    meta_path = os.path.join(directory, META_FILE)
+    with open(meta_path + '.tmp', 'w') as meta_file:
+        json.dump(meta, meta_file)
+    # the meta file is swapped last, it is what readers use to notice a new build
+    os.replace(meta_path + '.tmp', meta_path)
+
+
+def build_index(directory=None, full=False):
+    directory = directory or index_dir()
+    started_at = timezone.now()
+    dimension = settings.HASHED_VECTOR_DIMENSION
+    # vectors of another TOKEN_PIPELINE are left out until rebuild_term_vectors has rebuilt them
+    vectors = ResumeTermVector.objects.filter(pipeline=pipeline_stamp())
+    existing = os.path.exists(os.path.join(directory, META_FILE))
+    if existing and not full:
+        meta, ids, projections, projection, trees = read_index(directory)
+        full = meta['dimension'] != dimension or meta['projected'] != settings.ANN_PROJECTION_DIM or \
+            meta.get('pipeline') != pipeline_stamp()
+
+    if full or not existing:
+        projection = projection_matrix(dimension, settings.ANN_PROJECTION_DIM)
+        ids, rows = project_vectors(vectors.iterator(chunk_size=500), projection)
+        ids = np.array(ids, dtype=np.int64)
+        projections = np.array(rows, dtype=np.float32).reshape(-1, projection.shape[1])
+        generator = np.random.RandomState(PROJECTION_SEED)
+        trees = [build_tree(projections, settings.ANN_LEAF_SIZE, generator) for _ in range(settings.ANN_TREES)]
+        changed = len(ids)
+    else:
+        # the split planes are kept, changed resumes are re-projected and dropped into the leaf they now fall into
+        ids = ids.copy()
+        positions = {resume_id: position for position, resume_id in enumerate(ids.tolist())}
+        live_ids = set(vectors.values_list('resume_id', flat=True))
+        changed = list(vectors.filter(updated_at__gte=parse_datetime(meta['built_at'])))
+        changed_ids, rows = project_vectors(changed, projection)
+        # deleted and emptied resumes stay in the arrays but are skipped by every query
+        for resume_id in (set(positions) - live_ids) | {vector.resume_id for vector in changed if not vector.norm}:
+            if resume_id in positions:
+                ids[positions[resume_id]] = -1
+
+        new_ids = []
+        new_rows = []
+        for resume_id, row in zip(changed_ids, rows):
+            if resume_id in positions:
+                ids[positions[resume_id]] = resume_id
+                projections[positions[resume_id]] = row
+            else:
+                positions[resume_id] = len(ids) + len(new_ids)
+                new_ids.append(resume_id)
+                new_rows.append(row)
+        ids = np.concatenate([ids, np.array(new_ids, dtype=np.int64)])
+        projections = np.vstack([projections, np.array(new_rows, dtype=np.float32).reshape(-1, projection.shape[1])])
+        for tree in trees:
+            leaf_of = np.concatenate([tree['leaf_of'], np.zeros(len(new_ids), dtype=np.int32)])
+            for resume_id in changed_ids:
+                leaf_of[positions[resume_id]] = descend(tree, projections[positions[resume_id]])
+            tree['leaf_of'] = leaf_of
+        changed = len(changed)
+
+    write_index(directory, started_at, ids, projections, projection, trees)
+    truncate_pending(directory, started_at)
+    return {'changed': changed, 'indexed': int((ids >= 0).sum()), 'trees': len(trees)}
+
+
+def record_resume_change(resume_id, directory=None):
+    # called after a resume vector changes, queries scan the logged resumes exactly until the next build folds them in
+    directory = directory or index_dir()
+    if os.path.exists(os.path.join(directory, META_FILE)):
+        with open(os.path.join(directory, PENDING_FILE), 'a') as pending_file:
+            pending_file.write(f'{resume_id}\t{time.time()}\n')
+
+
+def read_pending(directory):
+    path = os.path.join(directory, PENDING_FILE)
+    if not os.path.exists(path):
+        return []
+    with open(path) as pending_file:
+        return [line.split('\t') for line in pending_file if line.strip()]
+
+
+def truncate_pending(directory, built_at):
+    # changes logged after the build started are not in the index yet and stay pending
+    kept = [(resume_id, logged) for resume_id, logged in read_pending(directory) if float(logged) >= built_at.timestamp()]
+    path = os.path.join(directory, PENDING_FILE)
+    with open(path + '.tmp', 'w') as pending_file:
+        pending_file.writelines(f'{resume_id}\t{logged}' for resume_id, logged in kept)
+    os.replace(path + '.tmp', path)
+
+
+class AnnIndex:
+    def __init__(self, directory):
+        self.directory = directory
+        self.meta, self.ids, self.projections, self.projection, self.trees = read_index(directory, mmap_mode='r')
+        self.built_at = parse_datetime(self.meta['built_at'])
+        self.leaves = []
+        for tree in self.trees:
+            order = np.argsort(tree['leaf_of'], kind='stable')
+            bounds = np.searchsorted(tree['leaf_of'][order], np.arange(tree['leaf_of'].max(initial=-1) + 2))
+            self.leaves.append((order, bounds))
+
+    def candidates(self, point, search_k):
+        # best-first descent over all trees at once, ordered by the smallest margin to the split planes on the way
+        heap = [(-np.inf, number, 0) for number in range(len(self.trees))]
+        found = set()
+        while heap and len(found) < search_k:
+            priority, number, node = heapq.heappop(heap)
+            tree = self.trees[number]
+            if node < 0 or not len(tree['children']):
+                order, bounds = self.leaves[number]
+                leaf = -node - 1 if node < 0 else 0
+                if leaf + 1 < len(bounds):
+                    found.update(order[bounds[leaf]:bounds[leaf + 1]].tolist())
+                continue
+            margin = float(point @ tree['normals'][node] - tree['offsets'][node])
+            left, right = tree['children'][node]
+            heapq.heappush(heap, (max(priority, -margin), number, int(right)))
+            heapq.heappush(heap, (max(priority, margin), number, int(left)))
+        return found
+
+    def nearest(self, query_vector, k=20, search_k=None):
+        stats = {'indexed': len(self.ids), 'candidates': 0, 'pending': 0, 'reranked': 0}
+        if k <= 0 or not query_vector.any():
+            return [], stats
+        point = query_vector @ self.projection
+        positions = np.fromiter(self.candidates(point, search_k or settings.ANN_SEARCH_K), dtype=np.int64)
+        positions = positions[self.ids[positions] >= 0]
+        stats['candidates'] = len(positions)
+
+        # cheap cut in the projected space, then the exact score on the stored vectors of the few that are left
+        approximate = np.asarray(self.projections[np.sort(positions)]) @ point
+        shortlist = np.sort(positions)[np.argsort(-approximate)[:k * settings.ANN_RERANK_FACTOR]]
+        resume_ids = set(self.ids[shortlist].tolist())
+        pending = {int(resume_id) for resume_id, _ in read_pending(self.directory)}
+        stats['pending'] = len(pending)
+        resume_ids |= pending
+
+        # the JSON terms are only loaded again for vectors hashed at another dimension
+        vectors = list(ResumeTermVector.objects.filter(resume_id__in=resume_ids, pipeline=pipeline_stamp())
+                       .only('resume_id', 'norm', 'hashed'))
+        stats['reranked'] = len(vectors)
+        scores = hashed_matrix(vectors) @ query_vector
+        ranked = sorted(zip(scores.tolist(), [vector.resume_id for vector in vectors]), key=lambda item: (-item[0], item[1]))
+        return [(resume_id, score) for score, resume_id in ranked[:k]], stats
+
+
+def get_ann_index():
+    global _loaded_index
+    meta_path = os.path.join(index_dir(), META_FILE)
+    if not os.path.exists(meta_path):
+        return None
+    modified = os.path.getmtime(meta_path)
+    if _loaded_index is None or _loaded_index[0] != modified:
+        _loaded_index = (modified, AnnIndex(index_dir()))
+    meta = _loaded_index[1].meta
+    # an index of another pipeline or vector width cannot be queried until build_ann_index has rebuilt it
+    if meta.get('pipeline') != pipeline_stamp() or meta['dimension'] != settings.HASHED_VECTOR_DIMENSION or \
+            meta['projected'] != settings.ANN_PROJECTION_DIM:
+        return None
+    return _loaded_index[1]
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ClassifyResumeConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'classify_resume'
+
+    def ready(self):
+        from classify_resume import signals  # noqa: F401
@@ -0,0 +1,9 @@
+from django.utils.functional import SimpleLazyObject
+
+from classify_resume.middleware import get_resume
+
+
+def current_resume(request):
+    # the header avatar and name of the user pages, only queried when a template uses it; a view that renders
+    # another user's resume sets its own user_info, which takes precedence
+    return {'user_info': SimpleLazyObject(lambda: get_resume(request))}
@@ -0,0 +1,143 @@
+import zlib
+
+from functools import lru_cache
+
+import numpy as np
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from classify_resume.models import ResumePersonalInfo, ResumeSignature
+from classify_resume.tokenizer import html_tokens
+
+# universal hashing modulo a Mersenne prime stands in for the random permutations of MinHash
+MERSENNE_PRIME = (1 << 31) - 1
+SHINGLE_SIZE = 3
+# fixed seed: stored signatures are only comparable when every process draws the same hash functions
+SIGNATURE_SEED = 1729
+
+
+@lru_cache(maxsize=None)
+def hash_coefficients(permutations):
+    generator = np.random.RandomState(SIGNATURE_SEED)
+    return (
+        generator.randint(1, MERSENNE_PRIME, size=(permutations, 1), dtype=np.int64),
+        generator.randint(0, MERSENNE_PRIME, size=(permutations, 1), dtype=np.int64),
+    )
+
+
+def resume_shingles(resume):
+    tokens = []
+    for text in [resume.about_description] + \
+            [info.official_description for info in resume.user_professional_info.all()] + \
+            [info.skill_type for info in resume.user_skill_info.all()] + \
+            [info.degree_description for info in resume.user_education_info.all()] + \
+            [info.cert_description for info in resume.user_cert_info.all()]:
+        tokens.extend(html_tokens(text))
+    if len(tokens) < SHINGLE_SIZE:
+        return {' '.join(tokens)} if tokens else set()
+    return {' '.join(tokens[start:start + SHINGLE_SIZE]) for start in range(len(tokens) - SHINGLE_SIZE + 1)}
+
+
+def minhash(shingles, permutations=None):
+    if not shingles:
+        return []
+    multipliers, increments = hash_coefficients(permutations or settings.MINHASH_PERMUTATIONS)
+    hashes = np.fromiter((zlib.crc32(shingle.encode()) % MERSENNE_PRIME for shingle in shingles), dtype=np.int64)
+    # a, x < 2^31 so a * x + b stays inside int64
+    return ((multipliers * hashes + increments) % MERSENNE_PRIME).min(axis=1).tolist()
+
+
+def estimated_similarity(signature1, signature2):
+    return sum(value1 == value2 for value1, value2 in zip(signature1, signature2)) / len(signature1)
+
+
+def rebuild_resume_signature(resume):
+    signature, _ = ResumeSignature.objects.update_or_create(
+        resume=resume,
+        defaults={'minhash': minhash(resume_shingles(resume))}
+    )
+    return signature
+
+
+def rebuild_resume_signature_by_id(resume_id):
+    resume = ResumePersonalInfo.objects.filter(pk=resume_id).first()
+    if resume is not None:
+        rebuild_resume_signature(resume)
+
+
+def band_rows():
+    permutations = settings.MINHASH_PERMUTATIONS
+    bands = settings.MINHASH_BANDS
+    if bands < 1 or permutations < bands:
+        raise ImproperlyConfigured(
+            f'MINHASH_BANDS must be between 1 and MINHASH_PERMUTATIONS ({permutations}), got {bands}'
+        )
+    return permutations // bands
+
+
+def near_duplicate_clusters(signatures):
+    # LSH banding: keys sharing all rows of at least one band become candidates, and each candidate is verified
+    # against the first key of its bucket only, so the work stays linear in the number of signatures
+    bands = settings.MINHASH_BANDS
+    rows = band_rows()
+    threshold = settings.NEAR_DUPLICATE_THRESHOLD
+    parents = {}
+
+    def root(key):
+        while parents[key] != key:
+            parents[key] = parents[parents[key]]
+            key = parents[key]
+        return key
+
+    buckets = {}
+    for key, signature in signatures.items():
+        if not signature:
+            continue
+        parents[key] = key
+        for band in range(bands):
+            head = buckets.setdefault((band, tuple(signature[band * rows:(band + 1) * rows])), key)
+            if head != key and root(head) != root(key) and \
+                    estimated_similarity(signatures[head], signature) >= threshold:
+                parents[root(key)] = root(head)
+
+    clusters = {}
+    for key in parents:
+        clusters.setdefault(root(key), []).append(key)
+    return [members for members in clusters.values() if len(members) > 1]
+
+
+def applicant_signatures(user_ids):
+    # same resume choice as applicant_term_vectors: the lowest resume id of each user
+    resumes = {}
+    for resume in ResumePersonalInfo.objects.filter(user_id__in=user_ids).select_related('signature').order_by('-id'):
+        resumes[resume.user_id] = resume
+
+    signatures = {}
+    for user_id, resume in resumes.items():
+        try:
+            signature = resume.signature
+        except ResumeSignature.DoesNotExist:
+            signature = None
+        if signature is None or (signature.minhash and len(signature.minhash) != settings.MINHASH_PERMUTATIONS):
+            signature = rebuild_resume_signature(resume)
+        signatures[user_id] = signature.minhash
+    return signatures
+
+
+def collapse_duplicate_applicants(applicants):
+    # keeps the best ranked application of every near-duplicate cluster; returns the ranked ids that are left and
+    # the number of hidden duplicates per kept application
+    ranked = list(applicants.values_list('id', 'user_id'))
+    signatures = applicant_signatures({user_id for _, user_id in ranked})
+    position = {application_id: rank for rank, (application_id, _) in enumerate(ranked)}
+    clusters = near_duplicate_clusters({
+        application_id: signatures.get(user_id, []) for application_id, user_id in ranked
+    })
+
+    hidden = set()
+    duplicates = {}
+    for members in clusters:
+        members.sort(key=position.get)
+        duplicates[members[0]] = len(members) - 1
+        hidden.update(members[1:])
+    return [application_id for application_id, _ in ranked if application_id not in hidden], duplicates
@@ -192,15 +192,30 @@ class JobEditForm(forms.ModelForm):
         min_length=25, max_length=1000, required=False,
         widget=forms.Textarea(attrs={'rows': '8', 'class': 'form-control', 'placeholder': 'Write Job Description'})
     )
+    salary_buckets = forms.CharField(
+        required=False, label='Salary histogram buckets',
+        widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Upper bounds, e.g. 50000, 100000'})
+    )
 
     class Meta:
         model = Jobs
-        fields = ('job_title', 'last_date', 'ads', 'is_active', 'job_description')
+        fields = ('job_title', 'last_date', 'ads', 'is_active', 'job_description', 'salary_buckets')
         widgets = {
             'input_formats': settings.DATE_INPUT_FORMATS,
             'last_date': forms.DateInput(attrs={'class': 'datepicker form-control', 'placeholder': 'DD/MM/YYYY'}),
         }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.initial['salary_buckets'] = ', '.join(str(bound) for bound in self.instance.salary_buckets)
+
+    def clean_salary_buckets(self):
+        values = [value.strip() for value in self.cleaned_data['salary_buckets'].split(',') if value.strip()]
+        # isdigit() alone also accepts digits int() cannot read, like '²'
+        if not all(value.isascii() and value.isdigit() for value in values):
+            raise forms.ValidationError("Salary buckets must be whole numbers separated by commas")
+        return sorted({int(value) for value in values if int(value) > 0})
+
 
 class EmailForm(forms.ModelForm):
     email_title = forms.CharField(
@@ -0,0 +1,109 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern
+
+from classify_resume import urls
+from classify_resume.models import AppliedJob, CertificateInfo, EmailContent, Jobs, ProfessionalExperienceInfo, \
+    ResumeEducationInfo, ResumePersonalInfo, SkillInfo, User
+
+
+def explain(sql):
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def full_scans(plan):
+    # 'SCAN table' reads every row; 'SCAN table USING ... INDEX' walks an index and 'SEARCH' seeks one
+    return [step for step in plan if step.startswith('SCAN ') and ' USING ' not in step]
+
+
+class Command(BaseCommand):
+    help = 'Request every classify_resume URL, EXPLAIN QUERY PLAN the SELECTs it runs and flag full table scans'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--admin', help='username the admin pages are requested as, default the one with most jobs')
+        parser.add_argument('--applicant', help='username the user pages are requested as, default one with a resume')
+        parser.add_argument('--strict', action='store_true', help='exit with an error when a full scan is found')
+        parser.add_argument('--verbose', action='store_true', help='print every plan, not only the flagged ones')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('EXPLAIN QUERY PLAN is SQLite syntax, run the audit against the SQLite database')
+        admin = self.pick_user(options['admin'], User.objects.annotate(jobs=Count('user_jobs')).order_by('-jobs'))
+        applicant = self.pick_user(options['applicant'], User.objects.filter(user_resume__isnull=False))
+        if admin is None or applicant is None:
+            raise CommandError('Need an admin with jobs and an applicant with a resume to request the pages as')
+        samples = self.sample_arguments(admin, applicant)
+
+        flagged = 0
+        for pattern in urls.urlpatterns:
+            if not isinstance(pattern, URLPattern):
+                continue
+            path = self.sample_path(pattern, samples)
+            if path is None:
+                self.stdout.write(f'{pattern.name:>32}: skipped, no sample row for {sorted(pattern.pattern.converters)}')
+                continue
+            user = admin if pattern.name.startswith('admin') else applicant
+            status, statements = self.request(path, user)
+            scans = sorts = 0
+            for sql in statements:
+                plan = explain(sql)
+                scanned = full_scans(plan)
+                scans += len(scanned)
+                # not flagged, but an index in the right order would save the sort
+                sorts += sum('USE TEMP B-TREE' in step for step in plan)
+                if scanned or options['verbose']:
+                    self.stdout.write(f'{"":>34}{"FULL SCAN " if scanned else ""}{" | ".join(plan)}')
+                    self.stdout.write(f'{"":>36}{sql[:300]}')
+            flagged += scans
+            style = self.style.WARNING if scans else self.style.SUCCESS
+            self.stdout.write(style(
+                f'{pattern.name:>32}: {path} [{status}] ran {len(statements)} selects, {scans} full scans, {sorts} sorts'
+            ))
+
+        self.stdout.write(f'{flagged} full table scans in total')
+        if flagged and options['strict']:
+            raise CommandError(f'{flagged} full table scans found')
+
+    def pick_user(self, username, candidates):
+        if username:
+            return User.objects.filter(username=username).first()
+        return candidates.first()
+
+    def sample_arguments(self, admin, applicant):
+        job = Jobs.objects.filter(user=admin, is_active=True).first()
+        resume = ResumePersonalInfo.objects.filter(user=applicant).first()
+        samples = {
+            'job_id': job.id if job else None,
+            'user_id': applicant.id,
+            'apply_id': AppliedJob.objects.filter(apply_job=job).values_list('id', flat=True).first() if job else None,
+            'mail_id': EmailContent.objects.values_list('id', flat=True).first(),
+        }
+        for name, model in (('education_id', ResumeEducationInfo), ('profession_id', ProfessionalExperienceInfo),
+                            ('certificate_id', CertificateInfo), ('skill_id', SkillInfo)):
+            samples[name] = model.objects.filter(user_info=resume).values_list('id', flat=True).first()
+        return samples
+
+    def sample_path(self, pattern, samples):
+        kwargs = {name: samples.get(name) for name in pattern.pattern.converters}
+        if None in kwargs.values():
+            return None
+        route = str(pattern.pattern)
+        for name, value in kwargs.items():
+            route = route.replace(f'<int:{name}>', str(value))
+        return '/' + route
+
+    def request(self, path, user):
+        client = Client(HTTP_HOST='localhost', raise_request_exception=False)
+        client.force_login(user)
+        # some pages delete or update on GET, nothing they write is kept and nothing is enqueued
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get(path)
+            statements = [query['sql'] for query in queries.captured_queries]
+            transaction.set_rollback(True)
+        return response.status_code, [sql for sql in statements if sql.lstrip().upper().startswith('SELECT')]
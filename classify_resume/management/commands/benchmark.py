@@ -0,0 +1,249 @@
+import json
+import platform
+import statistics
+import sys
+import time
+
+from collections import Counter
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from classify_resume.models import ResumeTermVector
+from classify_resume.pipeline import analyze, pipeline_stamp
+from classify_resume.scoring import batch_cosine_scores, calculate_cosine_similarity, ckeditor_clean, hashed_vector, \
+    preprocess_text, score_term_vectors, text_to_terms, vector_norm
+from classify_resume.synthetic import SyntheticCorpus
+from classify_resume.tokenizer import html_tokens
+
+# ranking corpora repeat this many distinct resumes, generating 100k unique ones would dominate the run
+DISTINCT_RESUMES = 10000
+BENCHMARKS = ('text', 'rank', 'tokenizer', 'pipeline', 'hashing')
+
+
+def measure(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def markdown_terms(html):
+    return Counter(preprocess_text(ckeditor_clean(html)).split())
+
+
+def streaming_terms(html):
+    return Counter(html_tokens(html))
+
+
+class Command(BaseCommand):
+    help = 'Time the matcher on a synthetic corpus; JSON results can be compared with an earlier run to catch regressions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--benchmarks', default=','.join(BENCHMARKS),
+                            help=f'comma separated benchmarks to run: {", ".join(BENCHMARKS)}')
+        parser.add_argument('--sizes', default='10,1000,100000', help='comma separated applicant counts to rank')
+        parser.add_argument('--scorers', default='cosine,hashed', help='comma separated RESUME_SCORER values to rank with')
+        parser.add_argument('--documents', type=int, default=200, help='documents timed by the text benchmarks')
+        parser.add_argument('--queries', type=int, default=20,
+                            help='jobs scored against every resume by the pipeline and hashing benchmarks')
+        parser.add_argument('--dimensions', default='256,1024,4096,16384',
+                            help='comma separated vector widths of the hashing benchmark')
+        parser.add_argument('--top', type=int, default=10, help='ranking depth compared by the hashing benchmark')
+        parser.add_argument('--repeat', type=int, default=5, help='timed runs per benchmark, the median is reported')
+        parser.add_argument('--seed', type=int, default=0, help='seed of the synthetic corpus')
+        parser.add_argument('--max-matrix-mb', type=int, default=1024,
+                            help='skip hashed rankings whose float32 matrix would be larger')
+        parser.add_argument('--output', help="write the JSON results to this file, '-' for stdout only")
+        parser.add_argument('--compare', help='JSON results of an earlier run to compare against')
+        parser.add_argument('--threshold', type=float, default=1.25,
+                            help='slowdown ratio against --compare that counts as a regression')
+
+    def handle(self, *args, **options):
+        self.quiet = options['output'] == '-'
+        selected = options['benchmarks'].split(',')
+        unknown = set(selected) - set(BENCHMARKS)
+        if unknown:
+            raise CommandError(f'Unknown benchmarks {", ".join(sorted(unknown))}, expected {", ".join(BENCHMARKS)}')
+        self.repeat = max(options['repeat'], 1)
+        self.corpus = SyntheticCorpus(options['seed'])
+        self.jobs = [self.corpus.job_description() for _ in range(options['documents'])]
+        self.resumes = [self.corpus.resume_experience() for _ in range(options['documents'])]
+
+        results = {}
+        for name in BENCHMARKS:
+            if name in selected:
+                getattr(self, f'benchmark_{name}')(results, options)
+
+        report = {
+            'created_at': timezone.now().isoformat(),
+            'environment': {
+                'python': sys.version.split()[0],
+                'numpy': np.__version__,
+                'platform': platform.platform(),
+                'token_pipeline': list(settings.TOKEN_PIPELINE),
+                'hashed_vector_dimension': settings.HASHED_VECTOR_DIMENSION,
+            },
+            'options': {
+                name: options[name]
+                for name in ('benchmarks', 'sizes', 'scorers', 'documents', 'queries', 'dimensions', 'top', 'repeat',
+                             'seed')
+            },
+            'results': results,
+        }
+        if options['output'] == '-':
+            self.stdout.write(json.dumps(report, indent=2))
+        elif options['output']:
+            with open(options['output'], 'w') as output_file:
+                json.dump(report, output_file, indent=2)
+            self.write(f'Results written to {options["output"]}')
+        if options['compare']:
+            self.compare(results, options['compare'], options['threshold'])
+
+    def benchmark_text(self, results, options):
+        documents = self.jobs + self.resumes
+        texts = [ckeditor_clean(html) for html in documents]
+        self.record(results, 'ckeditor_clean', len(documents),
+                    measure(lambda: [ckeditor_clean(html) for html in documents], self.repeat))
+        self.record(results, 'preprocess_text', len(texts),
+                    measure(lambda: [preprocess_text(text) for text in texts], self.repeat))
+        self.record(results, 'text_to_terms', len(documents),
+                    measure(lambda: [text_to_terms(html) for html in documents], self.repeat))
+        pairs = list(zip(texts[:len(self.jobs)], texts[len(self.jobs):]))
+        self.record(results, 'calculate_cosine_similarity', len(pairs),
+                    measure(lambda: [calculate_cosine_similarity(job, resume) for job, resume in pairs], self.repeat))
+
+    def benchmark_rank(self, results, options):
+        sizes = [int(size) for size in options['sizes'].split(',')]
+        job_terms = text_to_terms(self.jobs[0])
+        distinct = []
+        for _ in range(min(max(sizes), DISTINCT_RESUMES)):
+            terms = Counter(analyze(self.corpus.words(120)))
+            distinct.append(ResumeTermVector(terms=dict(terms), norm=vector_norm(terms)))
+        for scorer in options['scorers'].split(','):
+            if scorer == 'hashed':
+                for vector in distinct:
+                    vector.hashed = hashed_vector(vector.terms).tobytes()
+            for size in sizes:
+                matrix_mb = size * settings.HASHED_VECTOR_DIMENSION * 4 / 2 ** 20
+                if scorer == 'hashed' and matrix_mb > options['max_matrix_mb']:
+                    self.write(f'{f"rank/{scorer}/{size}":>32}: skipped, needs a {matrix_mb:.0f} MB matrix '
+                               f'(--max-matrix-mb {options["max_matrix_mb"]})')
+                    continue
+                vectors = [distinct[position % len(distinct)] for position in range(size)]
+                # full ranking: every applicant scored, then sorted best first
+                self.record(results, f'rank/{scorer}/{size}', size, measure(
+                    lambda: np.argsort(-score_term_vectors(job_terms, vectors, scorer), kind='stable'), self.repeat
+                ))
+
+    def benchmark_tokenizer(self, results, options):
+        # the streaming HTML tokenizer against html2text + preprocess_text, which it has to agree with
+        documents = self.jobs + self.resumes
+        mismatches = sum(markdown_terms(html) != streaming_terms(html) for html in documents)
+        self.record(results, 'tokenizer/html2text', len(documents),
+                    measure(lambda: [markdown_terms(html) for html in documents], self.repeat))
+        self.record(results, 'tokenizer/html_tokens', len(documents),
+                    measure(lambda: [streaming_terms(html) for html in documents], self.repeat),
+                    token_mismatches=mismatches)
+
+    def benchmark_pipeline(self, results, options):
+        # vocabulary, vector length and scoring cost of the token pipeline stages
+        queries = self.jobs[:max(options['queries'], 1)]
+        configured = list(settings.TOKEN_PIPELINE)
+        pipelines = [[], configured]
+        if 'bigrams' not in configured:
+            pipelines.append(configured + ['bigrams'])
+        for stages in pipelines:
+            name = f'pipeline/{pipeline_stamp(stages) or "raw"}'
+            vectors = [(terms, vector_norm(terms)) for terms in (text_to_terms(html, stages) for html in self.resumes)]
+            job_vectors = [text_to_terms(html, stages) for html in queries]
+            vocabulary = set()
+            for terms, _ in vectors:
+                vocabulary.update(terms)
+            self.record(results, f'{name}/analyze', len(self.resumes),
+                        measure(lambda: [text_to_terms(html, stages) for html in self.resumes], self.repeat),
+                        vocabulary=len(vocabulary),
+                        terms_per_vector=sum(len(terms) for terms, _ in vectors) / len(vectors),
+                        terms_per_job=sum(len(terms) for terms in job_vectors) / len(job_vectors))
+            self.record(results, f'{name}/score', len(queries) * len(vectors), measure(
+                lambda: [batch_cosine_scores(terms, vector_norm(terms), vectors) for terms in job_vectors], self.repeat
+            ))
+
+    def benchmark_hashing(self, results, options):
+        # accuracy lost by feature-hashed vectors against the exact calculate_cosine_similarity, raw words on both
+        # sides so the only difference is the hashing itself
+        jobs = self.jobs[:max(options['queries'], 1)]
+        resume_texts = [ckeditor_clean(html) for html in self.resumes]
+        job_texts = [ckeditor_clean(html) for html in jobs]
+        resume_terms = [text_to_terms(html, []) for html in self.resumes]
+        job_terms = [text_to_terms(html, []) for html in jobs]
+        pairs = len(jobs) * len(self.resumes)
+
+        exact = np.array([[calculate_cosine_similarity(job, text) for text in resume_texts] for job in job_texts])
+        self.record(results, 'hashing/exact', pairs, measure(
+            lambda: [[calculate_cosine_similarity(job, text) for text in resume_texts] for job in job_texts],
+            self.repeat
+        ))
+        vectors = [(terms, vector_norm(terms)) for terms in resume_terms]
+        self.record(results, 'hashing/batch_cosine', pairs, measure(
+            lambda: [batch_cosine_scores(terms, vector_norm(terms), vectors) for terms in job_terms], self.repeat
+        ))
+
+        top = min(options['top'], len(self.resumes))
+        exact_top = [set(np.argsort(-row, kind='stable')[:top]) for row in exact]
+        for dimension in (int(value) for value in options['dimensions'].split(',')):
+            matrix = np.vstack([hashed_vector(terms, dimension) for terms in resume_terms])
+            queries = [hashed_vector(terms, dimension) for terms in job_terms]
+            hashed = np.array([matrix @ query for query in queries])
+            errors = np.abs(hashed - exact)
+            overlap = np.mean([
+                len(expected & set(np.argsort(-row, kind='stable')[:top])) / top
+                for expected, row in zip(exact_top, hashed)
+            ])
+            self.record(results, f'hashing/{dimension}', pairs,
+                        measure(lambda: [matrix @ query for query in queries], self.repeat),
+                        bytes_per_vector=dimension * 4, mean_error=float(errors.mean()),
+                        max_error=float(errors.max()), top_overlap=float(overlap))
+
+    def record(self, results, name, items, timings, **metrics):
+        # metrics are the non-timing numbers of a benchmark (vocabulary size, hashing error, ...), reported as is
+        median = statistics.median(timings)
+        results[name] = {
+            'items': items,
+            'median_s': median,
+            'min_s': min(timings),
+            'per_item_us': median / items * 1e6,
+            **metrics,
+        }
+        details = ''.join(
+            f', {metric} {value:.4g}' if isinstance(value, float) else f', {metric} {value}'
+            for metric, value in metrics.items()
+        )
+        self.write(f'{name:>32}: {median * 1000:10.2f} ms for {items:6d} items, {median / items * 1e6:10.2f} us/item'
+                   f'{details}')
+
+    def compare(self, results, path, threshold):
+        with open(path) as previous_file:
+            previous = json.load(previous_file)['results']
+        regressions = []
+        self.write(f'Compared with {path} (regression above {threshold:.2f}x):')
+        for name, result in results.items():
+            if name not in previous:
+                continue
+            ratio = result['median_s'] / previous[name]['median_s']
+            if ratio > threshold:
+                regressions.append(name)
+            self.write(f'{name:>32}: {ratio:6.2f}x{"  REGRESSION" if ratio > threshold else ""}')
+        if regressions:
+            raise CommandError(f'{len(regressions)} benchmarks regressed: {", ".join(regressions)}')
+
+    def write(self, message):
+        # with --output - stdout carries the JSON only
+        if self.quiet:
+            self.stderr.write(message)
+        else:
+            self.stdout.write(message)
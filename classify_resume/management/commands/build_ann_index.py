@@ -0,0 +1,59 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from classify_resume.ann_index import build_index, AnnIndex, index_dir
+from classify_resume.models import Jobs, ResumeTermVector
+from classify_resume.pipeline import pipeline_stamp
+from classify_resume.scoring import hashed_matrix, hashed_vector, job_term_vector
+
+
+class Command(BaseCommand):
+    help = 'Update the approximate nearest-neighbour resume index and report its recall against exact search'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='discard the existing index and rebuild from scratch')
+        parser.add_argument('--recall', type=int, default=20, help='jobs used to measure recall, 0 to skip')
+        parser.add_argument('--k', type=int, default=20, help='neighbours per job in the recall report')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        result = build_index(full=options['full'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {result['changed']} changed resumes, {result['indexed']} in {result['trees']} trees "
+            f"({time.perf_counter() - started:.1f} s)"
+        ))
+        if options['recall'] > 0:
+            self.report_recall(options['recall'], options['k'])
+
+    def report_recall(self, total, k):
+        jobs = list(Jobs.objects.filter(is_active=True).order_by('-id')[:total])
+        vectors = list(ResumeTermVector.objects.filter(norm__gt=0, pipeline=pipeline_stamp()))
+        if not jobs or not vectors:
+            self.stdout.write('No jobs or resume vectors to measure recall on')
+            return
+        index = AnnIndex(index_dir())
+        matrix = hashed_matrix(vectors)
+        resume_ids = np.array([vector.resume_id for vector in vectors])
+
+        recalls = []
+        exact_time = ann_time = 0
+        for job in jobs:
+            query = hashed_vector(job_term_vector(job).terms)
+            started = time.perf_counter()
+            scores = matrix @ query
+            expected = set(resume_ids[np.argsort(-scores, kind='stable')[:k]].tolist())
+            exact_time += time.perf_counter() - started
+
+            started = time.perf_counter()
+            found, _ = index.nearest(query, k)
+            ann_time += time.perf_counter() - started
+            if expected:
+                recalls.append(len(expected & {resume_id for resume_id, _ in found}) / len(expected))
+
+        self.stdout.write(
+            f'recall@{k} over {len(jobs)} jobs: {np.mean(recalls):.1%} (min {min(recalls):.1%}), '
+            f'{ann_time / len(jobs) * 1000:.1f} ms per ANN query, '
+            f'{exact_time / len(jobs) * 1000:.1f} ms per exact scan of {len(vectors)} in-memory vectors'
+        )
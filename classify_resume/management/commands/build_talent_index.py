@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from classify_resume.talent_index import build_index
+
+
+class Command(BaseCommand):
+    help = 'Update the on-disk talent pool index with the resumes changed since the last build'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='discard the existing index and rebuild from scratch')
+
+    def handle(self, *args, **options):
+        result = build_index(full=options['full'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {result['changed']} resumes: {result['terms']} terms, {result['postings']} postings"
+        ))
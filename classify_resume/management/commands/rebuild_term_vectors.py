@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+
+from classify_resume.duplicates import rebuild_resume_signature
+from classify_resume.models import ResumePersonalInfo, Jobs
+from classify_resume.pipeline import pipeline_stamp
+from classify_resume.scoring import rebuild_resume_term_vector, recount_corpus_statistics, rebuild_job_term_vector, \
+    rebuild_resume_section_vector, RESUME_SECTIONS
+from classify_resume.skills import rebuild_resume_skill_tags, job_required_skills
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the stored term vectors, skill tags and MinHash signatures of every resume and job ' \
+           '(or only the missing and stale ones)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--missing', action='store_true',
+                            help='only build vectors for rows without one or with one of another TOKEN_PIPELINE')
+
+    def handle(self, *args, **options):
+        resumes = ResumePersonalInfo.objects.prefetch_related(
+            'user_professional_info', *(related_name for related_name, _ in RESUME_SECTIONS.values())
+        )
+        jobs = Jobs.objects.all()
+        if options['missing']:
+            resumes = resumes.exclude(term_vector__pipeline=pipeline_stamp())
+            jobs = jobs.exclude(term_vector__pipeline=pipeline_stamp())
+
+        total = 0
+        for resume in resumes.iterator(chunk_size=500):
+            rebuild_resume_term_vector(resume)
+            for section in RESUME_SECTIONS:
+                rebuild_resume_section_vector(resume, section)
+            rebuild_resume_skill_tags(resume)
+            rebuild_resume_signature(resume)
+            total += 1
+        recount_corpus_statistics()
+
+        total_jobs = 0
+        for job in jobs.iterator(chunk_size=500):
+            rebuild_job_term_vector(job)
+            Jobs.objects.filter(pk=job.pk).update(required_skills=job_required_skills(job))
+            total_jobs += 1
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {total} resume and {total_jobs} job term vectors'))
@@ -0,0 +1,117 @@
+import os
+import time
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Q
+from django.utils.dateparse import parse_date
+
+from classify_resume.models import AppliedJob, Jobs, ResumePersonalInfo, ResumeSectionVector
+from classify_resume.pipeline import pipeline_stamp
+from classify_resume.scoring import rebuild_job_term_vector, rebuild_resume_section_vector, \
+    rebuild_resume_term_vector, score_applications
+
+
+def build_stale_vectors(applications):
+    # every vector the scoring reads is brought up to date here, in the parent, so the workers only read
+    stamp = pipeline_stamp()
+    user_ids = applications.values('user_id')
+    jobs = Jobs.objects.filter(pk__in=applications.values('apply_job_id')).exclude(term_vector__pipeline=stamp)
+    resumes = ResumePersonalInfo.objects.filter(user_id__in=user_ids).exclude(term_vector__pipeline=stamp)
+    sections = ResumeSectionVector.objects.filter(resume__user_id__in=user_ids).exclude(pipeline=stamp)
+    total = 0
+    for job in jobs.iterator(chunk_size=500):
+        rebuild_job_term_vector(job)
+        total += 1
+    for resume in resumes.prefetch_related('user_professional_info').iterator(chunk_size=500):
+        rebuild_resume_term_vector(resume)
+        total += 1
+    for vector in sections.select_related('resume').iterator(chunk_size=500):
+        rebuild_resume_section_vector(vector.resume, vector.section)
+        total += 1
+    return total
+
+
+def score_chunk(job_id, application_ids):
+    job = Jobs.objects.filter(pk=job_id).first()
+    if job is None:
+        return []
+    applications = list(AppliedJob.objects.filter(pk__in=application_ids).only('id', 'user_id'))
+    # a resume that got its first vector only after build_stale_vectors scores 0 instead of being written here
+    return [
+        (application.id, application.similarity_score)
+        for application in score_applications(job, applications, build_missing=False)
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Recompute the stored similarity score of job applications across a pool of worker processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--job', type=int, action='append', help='only this job id, can be repeated')
+        parser.add_argument('--since', help='only applications from this date (YYYY-MM-DD) or whose resume changed since')
+        parser.add_argument('--workers', type=int, default=os.cpu_count(), help='scoring processes, 1 to score inline')
+        parser.add_argument('--chunk-size', type=int, default=500, help='applications scored per task')
+
+    def handle(self, *args, **options):
+        applications = AppliedJob.objects.all()
+        if options['job']:
+            applications = applications.filter(apply_job_id__in=options['job'])
+        if options['since']:
+            since = parse_date(options['since'])
+            if since is None:
+                raise CommandError(f"--since expects a date like 2024-01-31, got {options['since']!r}")
+            applications = applications.filter(
+                Q(apply_date__gte=since) | Q(user__user_resume__term_vector__updated_at__date__gte=since)
+            ).distinct()
+
+        chunks = []
+        by_job = {}
+        for application_id, job_id in applications.order_by('apply_job_id', 'id').values_list('id', 'apply_job_id'):
+            by_job.setdefault(job_id, []).append(application_id)
+        for job_id, application_ids in by_job.items():
+            for start in range(0, len(application_ids), options['chunk_size']):
+                chunks.append((job_id, application_ids[start:start + options['chunk_size']]))
+        total = sum(len(application_ids) for _, application_ids in chunks)
+        if not total:
+            self.stdout.write('No applications to rescore')
+            return
+
+        rebuilt = build_stale_vectors(applications)
+        if rebuilt:
+            self.stdout.write(f'Built {rebuilt} missing or stale term vectors')
+
+        workers = max(1, min(options['workers'] or 1, len(chunks)))
+        self.stdout.write(f'Rescoring {total} applications of {len(by_job)} jobs in {len(chunks)} chunks, '
+                          f'{workers} workers')
+        started = time.perf_counter()
+        done = 0
+        if workers == 1:
+            for chunk in chunks:
+                done += self.write_scores(score_chunk(*chunk), done, total, started)
+        else:
+            # closed before forking so no worker inherits the parent's connection; django.setup covers spawned
+            # workers. The workers only read, the parent is the single writer (SQLite allows one at a time anyway)
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as pool:
+                futures = [pool.submit(score_chunk, *chunk) for chunk in chunks]
+                for future in as_completed(futures):
+                    done += self.write_scores(future.result(), done, total, started)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Rescored {done} applications in {elapsed:.1f} s ({done / elapsed:.0f} applications/s)'
+        ))
+
+    def write_scores(self, scores, done, total, started):
+        AppliedJob.objects.bulk_update(
+            [AppliedJob(id=application_id, similarity_score=score) for application_id, score in scores],
+            ['similarity_score'], batch_size=500
+        )
+        done += len(scores)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f'{done}/{total} ({done / total:.0%}), {done / elapsed:.0f} applications/s')
+        return len(scores)
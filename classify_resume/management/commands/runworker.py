@@ -0,0 +1,45 @@
+import os
+import signal
+import socket
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from classify_resume.tasks import claim_task, run_task
+
+
+class Command(BaseCommand):
+    help = 'Run queued background tasks, start the command several times for concurrent workers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--burst', action='store_true', help='exit once the queue is empty')
+        parser.add_argument('--sleep', type=float, default=None, help='seconds to wait when the queue is empty')
+
+    def handle(self, *args, **options):
+        worker = f'{socket.gethostname()}:{os.getpid()}'
+        sleep = settings.TASK_POLL_INTERVAL if options['sleep'] is None else options['sleep']
+        stopping = []
+        # finish the running task on SIGTERM/SIGINT, its lease would otherwise hold it back for the visibility timeout
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda *args: stopping.append(True))
+
+        self.stdout.write(f'Worker {worker} started')
+        done = failed = 0
+        while not stopping:
+            close_old_connections()
+            task = claim_task(worker)
+            if task is None:
+                if options['burst']:
+                    break
+                time.sleep(sleep)
+                continue
+            started = time.perf_counter()
+            if run_task(task, worker):
+                done += 1
+                self.stdout.write(f'{task.name} #{task.pk} done in {time.perf_counter() - started:.2f} s')
+            else:
+                failed += 1
+                self.stderr.write(f'{task.name} #{task.pk} failed on attempt {task.attempts}/{task.max_attempts}')
+        self.stdout.write(self.style.SUCCESS(f'Worker {worker} stopped: {done} done, {failed} failed'))
@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import SimpleLazyObject
+
+from classify_resume.models import ResumePersonalInfo
+
+
+def current_resume_key(user_id):
+    return f'current-resume:{user_id}'
+
+
+def current_resume(user):
+    if not user.is_authenticated:
+        return None
+    key = current_resume_key(user.id)
+    resume = cache.get(key) if settings.CURRENT_RESUME_CACHE_TIMEOUT else None
+    if resume is None:
+        resume = ResumePersonalInfo.objects.filter(user_id=user.id).order_by('id').first()
+        # a user without a resume is in the middle of the wizard, that is not cached
+        if resume is not None and settings.CURRENT_RESUME_CACHE_TIMEOUT:
+            cache.set(key, resume, settings.CURRENT_RESUME_CACHE_TIMEOUT)
+    return resume
+
+
+def get_resume(request):
+    # looked up the first time a view or template asks for it, then kept for the rest of the request
+    if not hasattr(request, '_cached_resume'):
+        request._cached_resume = current_resume(request.user)
+    return request._cached_resume
+
+
+class CurrentResumeMiddleware:
+    # request.resume is the first resume of the logged in user, or a lazy None; views that branch on it use
+    # get_resume(request), which returns the plain object
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.resume = SimpleLazyObject(lambda: get_resume(request))
+        return self.get_response(request)
@@ -0,0 +1,59 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:38
+
+from collections import Counter
+
+from django.db import migrations, models
+
+
+def count_existing_vectors(apps, schema_editor):
+    ResumeTermVector = apps.get_model('classify_resume', 'ResumeTermVector')
+    TermDocumentFrequency = apps.get_model('classify_resume', 'TermDocumentFrequency')
+    CorpusStatistics = apps.get_model('classify_resume', 'CorpusStatistics')
+
+    document_frequency = Counter()
+    total_length = 0
+    document_count = 0
+    for vector in ResumeTermVector.objects.iterator(chunk_size=500):
+        vector.length = sum(vector.terms.values())
+        vector.save(update_fields=['length'])
+        document_frequency.update(vector.terms.keys())
+        total_length += vector.length
+        document_count += 1
+
+    TermDocumentFrequency.objects.bulk_create(
+        [TermDocumentFrequency(term=term, document_count=count) for term, count in document_frequency.items()],
+        batch_size=1000
+    )
+    CorpusStatistics.objects.create(pk=1, document_count=document_count, total_length=total_length)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('classify_resume', '0016_resumetermvector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CorpusStatistics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('document_count', models.IntegerField(default=0)),
+                ('total_length', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TermDocumentFrequency',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=256, unique=True)),
+                ('document_count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='resumetermvector',
+            name='length',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(count_existing_vectors, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('classify_resume', '0017_corpusstatistics_termdocumentfrequency'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='appliedjob',
+            name='similarity_score',
+            field=models.FloatField(db_index=True, default=0),
+        ),
+    ]
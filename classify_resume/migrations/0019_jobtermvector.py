@@ -0,0 +1,24 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('classify_resume', '0018_appliedjob_similarity_score'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobTermVector',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('terms', models.JSONField(blank=True, default=dict)),
+                ('norm', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('job', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='term_vector', to='classify_resume.jobs')),
+            ],
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:41
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('classify_resume', '0019_jobtermvector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumeSectionVector',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('section', models.CharField(choices=[('skills', 'Skills'), ('education', 'Education'), ('certificates', 'Certificates')], max_length=32)),
+                ('terms', models.JSONField(blank=True, default=dict)),
+                ('norm', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('resume', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='section_vectors', to='classify_resume.resumepersonalinfo')),
+            ],
+            options={
+                'unique_together': {('resume', 'section')},
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:42
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('classify_resume', '0020_resumesectionvector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobs',
+            name='required_skills',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.CreateModel(
+            name='ResumeSkillTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('skill', models.CharField(db_index=True, max_length=256)),
+                ('resume', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='skill_tags', to='classify_resume.resumepersonalinfo')),
+            ],
+            options={
+                'unique_together': {('resume', 'skill')},
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('classify_resume', '0021_jobs_required_skills_resumeskilltag'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobs',
+            name='job_description_text',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='professionalexperienceinfo',
+            name='official_description_text',
+            field=models.TextField(blank=True, editable=False),
+        ),
+    ]
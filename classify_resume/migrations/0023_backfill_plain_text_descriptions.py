@@ -0,0 +1,36 @@
+import html2text
+from django.db import migrations
+
+BATCH_SIZE = 500
+
+
+def backfill(model, html_field, text_field):
+    last_id = 0
+    while True:
+        batch = list(model.objects.filter(pk__gt=last_id).order_by('pk').only('pk', html_field)[:BATCH_SIZE])
+        if not batch:
+            break
+        for row in batch:
+            setattr(row, text_field, html2text.html2text(getattr(row, html_field) or '', bodywidth=0))
+        model.objects.bulk_update(batch, [text_field])
+        last_id = batch[-1].pk
+
+
+def backfill_plain_text(apps, schema_editor):
+    backfill(apps.get_model('classify_resume', 'Jobs'), 'job_description', 'job_description_text')
+    backfill(
+        apps.get_model('classify_resume', 'ProfessionalExperienceInfo'),
+        'official_description',
+        'official_description_text'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('classify_resume', '0022_plain_text_descriptions'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_plain_text, migrations.RunPython.noop),
+    ]
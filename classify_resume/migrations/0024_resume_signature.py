@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:55
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('classify_resume', '0023_backfill_plain_text_descriptions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumeSignature',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('minhash', models.JSONField(blank=True, default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('resume', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='signature', to='classify_resume.resumepersonalinfo')),
+            ],
+        ),
+    ]
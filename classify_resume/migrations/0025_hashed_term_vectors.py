@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('classify_resume', '0024_resume_signature'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobtermvector',
+            name='hashed',
+            field=models.BinaryField(blank=True, default=b''),
+        ),
+        migrations.AddField(
+            model_name='resumetermvector',
+            name='hashed',
+            field=models.BinaryField(blank=True, default=b''),
+        ),
+    ]
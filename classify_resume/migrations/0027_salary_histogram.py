@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('classify_resume', '0026_task_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobs',
+            name='applications_version',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='jobs',
+            name='salary_buckets',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('classify_resume', '0027_salary_histogram'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='appliedjob',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['apply_job', '-similarity_score', 'id'], name='appliedjob_live_rank_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appliedjob',
+            index=models.Index(fields=['user', 'apply_job'], name='appliedjob_user_job_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobs',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['id'], name='jobs_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='resumepersonalinfo',
+            index=models.Index(fields=['user', 'id'], name='resume_user_first_idx'),
+        ),
+    ]
@@ -0,0 +1,59 @@
+from django.db import migrations
+
+# Full-text index of the active jobs, kept in sync by triggers so every write path is covered, .update() included.
+# The table keeps its own copy of the text: deleting by rowid then never depends on the old values.
+# A migration that rebuilds classify_resume_jobs (SQLite AlterField) drops these triggers, recreate them after it.
+CREATE_TABLE = '''
+CREATE VIRTUAL TABLE classify_resume_jobsearch USING fts5(
+    job_title, job_description_text, prefix='2 3', tokenize='porter unicode61 remove_diacritics 2'
+)
+'''
+CREATE_TRIGGERS = [
+    '''
+    CREATE TRIGGER classify_resume_jobsearch_insert AFTER INSERT ON classify_resume_jobs WHEN new.is_active
+    BEGIN
+        INSERT INTO classify_resume_jobsearch(rowid, job_title, job_description_text)
+        VALUES (new.id, new.job_title, new.job_description_text);
+    END
+    ''',
+    '''
+    CREATE TRIGGER classify_resume_jobsearch_delete AFTER DELETE ON classify_resume_jobs
+    BEGIN
+        DELETE FROM classify_resume_jobsearch WHERE rowid = old.id;
+    END
+    ''',
+    '''
+    CREATE TRIGGER classify_resume_jobsearch_update AFTER UPDATE OF job_title, job_description_text, is_active
+    ON classify_resume_jobs
+    WHEN old.job_title IS NOT new.job_title OR old.job_description_text IS NOT new.job_description_text
+        OR old.is_active IS NOT new.is_active
+    BEGIN
+        DELETE FROM classify_resume_jobsearch WHERE rowid = old.id;
+        INSERT INTO classify_resume_jobsearch(rowid, job_title, job_description_text)
+        SELECT new.id, new.job_title, new.job_description_text WHERE new.is_active;
+    END
+    ''',
+]
+FILL_TABLE = '''
+INSERT INTO classify_resume_jobsearch(rowid, job_title, job_description_text)
+SELECT id, job_title, job_description_text FROM classify_resume_jobs WHERE is_active
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('classify_resume', '0028_hot_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            [CREATE_TABLE, *CREATE_TRIGGERS, FILL_TABLE],
+            [
+                'DROP TRIGGER classify_resume_jobsearch_update',
+                'DROP TRIGGER classify_resume_jobsearch_delete',
+                'DROP TRIGGER classify_resume_jobsearch_insert',
+                'DROP TABLE classify_resume_jobsearch',
+            ],
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:41
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('classify_resume', '0029_job_search'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='appliedjob',
+            name='apply_date',
+            field=models.DateField(blank=True, default=django.utils.timezone.now, null=True),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('classify_resume', '0030_appliedjob_apply_date_default'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobtermvector',
+            name='pipeline',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='resumesectionvector',
+            name='pipeline',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='resumetermvector',
+            name='pipeline',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
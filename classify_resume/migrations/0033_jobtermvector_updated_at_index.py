@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 11:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('classify_resume', '0032_term_vector_pipeline'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='jobtermvector',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
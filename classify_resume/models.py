@@ -1,7 +1,6 @@
-from datetime import datetime
-
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.utils import timezone
 
 
 class User(AbstractUser):
@@ -16,7 +15,26 @@ class Jobs(models.Model):
     last_date = models.DateField(blank=True, null=True)
     ads = models.ImageField(upload_to='media/job/', default='media/job/default-ads.jpg')
     job_description = models.TextField(max_length=1000, blank=True)
+    job_description_text = models.TextField(blank=True, editable=False)
     is_active = models.BooleanField(default=True)
+    required_skills = models.JSONField(default=list, blank=True)
+    # upper bounds of the applicant salary histogram, empty for SALARY_HISTOGRAM_BOUNDS
+    salary_buckets = models.JSONField(default=list, blank=True)
+    # bumped whenever an application is added, removed or changes salary, it keys the cached histogram
+    applications_version = models.IntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            # job board and recommendation feed: only the active jobs
+            models.Index(fields=['id'], condition=models.Q(is_active=True), name='jobs_active_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # the pre_save receiver derives these from the description, a partial save of it has to write them too
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'job_description' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'job_description_text', 'required_skills'}
+        super().save(*args, **kwargs)
 
 
 class AppliedJob(models.Model):
@@ -24,9 +42,21 @@ class AppliedJob(models.Model):
     apply_job = models.ForeignKey(Jobs, related_name='user_apply_job', on_delete=models.CASCADE)
     current_salary = models.IntegerField(blank=True, default=0)
     expected_salary = models.IntegerField(blank=True, default=0)
-    apply_date = models.DateField(blank=True, null=True, default=datetime.now())
+    apply_date = models.DateField(blank=True, null=True, default=timezone.now)
     apply_status = models.CharField(max_length=256, blank=True)
     is_deleted = models.BooleanField(default=False)
+    similarity_score = models.FloatField(default=0, db_index=True)
+
+    class Meta:
+        indexes = [
+            # applicant ranking and salary histogram of a job, already in ranking order
+            models.Index(
+                fields=['apply_job', '-similarity_score', 'id'], condition=models.Q(is_deleted=False),
+                name='appliedjob_live_rank_idx'
+            ),
+            # already_applied check
+            models.Index(fields=['user', 'apply_job'], name='appliedjob_user_job_idx'),
+        ]
 
 
 class EmailContent(models.Model):
@@ -55,6 +85,12 @@ class ResumePersonalInfo(models.Model):
     user_address = models.CharField(max_length=256, blank=True)
     about_description = models.TextField(max_length=1000, blank=True)
 
+    class Meta:
+        indexes = [
+            # the first resume of a user, and of every applicant on the ranking page, without a sort
+            models.Index(fields=['user', 'id'], name='resume_user_first_idx'),
+        ]
+
 
 class ResumeEducationInfo(models.Model):
     user_info = models.ForeignKey(ResumePersonalInfo, related_name='user_education_info', on_delete=models.CASCADE)
@@ -72,6 +108,14 @@ class ProfessionalExperienceInfo(models.Model):
     start_experience = models.DateField(blank=True, null=True)
     end_experience = models.DateField(blank=True, null=True)
     official_description = models.TextField(max_length=1000, blank=True)
+    official_description_text = models.TextField(blank=True, editable=False)
+
+    def save(self, *args, **kwargs):
+        # like Jobs.save, the plain text follows the description on a partial save
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'official_description' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'official_description_text'}
+        super().save(*args, **kwargs)
 
 
 class SkillInfo(models.Model):
@@ -86,3 +130,89 @@ class CertificateInfo(models.Model):
     cert_image = models.ImageField(upload_to='media/certificate/', default='media/certificate/default-certificate.jpg')
     cert_description = models.TextField(max_length=1000, blank=True)
 
+
+
+class ResumeTermVector(models.Model):
+    resume = models.OneToOneField(ResumePersonalInfo, related_name='term_vector', on_delete=models.CASCADE)
+    terms = models.JSONField(default=dict, blank=True)
+    norm = models.FloatField(default=0)
+    length = models.IntegerField(default=0)
+    # unit length float32 feature-hashed copy of terms, HASHED_VECTOR_DIMENSION wide
+    hashed = models.BinaryField(default=b'', blank=True)
+    # the TOKEN_PIPELINE the terms were built with, see pipeline_stamp
+    pipeline = models.CharField(max_length=64, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+class ResumeSectionVector(models.Model):
+    SECTION_CHOICES = (
+        ('skills', 'Skills'),
+        ('education', 'Education'),
+        ('certificates', 'Certificates'),
+    )
+
+    resume = models.ForeignKey(ResumePersonalInfo, related_name='section_vectors', on_delete=models.CASCADE)
+    section = models.CharField(max_length=32, choices=SECTION_CHOICES)
+    terms = models.JSONField(default=dict, blank=True)
+    norm = models.FloatField(default=0)
+    pipeline = models.CharField(max_length=64, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('resume', 'section')
+
+
+class ResumeSkillTag(models.Model):
+    resume = models.ForeignKey(ResumePersonalInfo, related_name='skill_tags', on_delete=models.CASCADE)
+    skill = models.CharField(max_length=256, db_index=True)
+
+    class Meta:
+        unique_together = ('resume', 'skill')
+
+
+class JobTermVector(models.Model):
+    job = models.OneToOneField(Jobs, related_name='term_vector', on_delete=models.CASCADE)
+    terms = models.JSONField(default=dict, blank=True)
+    norm = models.FloatField(default=0)
+    hashed = models.BinaryField(default=b'', blank=True)
+    pipeline = models.CharField(max_length=64, blank=True)
+    # the version of the job, the feed looks up the vectors rebuilt since it last looked
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+
+class TermDocumentFrequency(models.Model):
+    term = models.CharField(max_length=256, unique=True)
+    document_count = models.IntegerField(default=0)
+
+
+class CorpusStatistics(models.Model):
+    document_count = models.IntegerField(default=0)
+    total_length = models.BigIntegerField(default=0)
+
+
+class ResumeSignature(models.Model):
+    resume = models.OneToOneField(ResumePersonalInfo, related_name='signature', on_delete=models.CASCADE)
+    minhash = models.JSONField(default=list, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+class Task(models.Model):
+    STATUS_CHOICES = (
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('failed', 'Failed'),
+    )
+
+    name = models.CharField(max_length=64)
+    payload = models.JSONField(default=dict, blank=True)
+    # sha1 of name and payload, an identical task that is still queued is not enqueued twice
+    key = models.CharField(max_length=40, db_index=True)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default='queued')
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=5)
+    run_after = models.DateTimeField(db_index=True)
+    # a running task whose lease ran out is picked up again by another worker
+    locked_by = models.CharField(max_length=128, blank=True)
+    locked_until = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
@@ -0,0 +1,162 @@
+import base64
+import binascii
+import json
+import operator
+
+from functools import reduce
+
+from django.db.models import Q
+
+
+class KeysetPage:
+    # one page of rows plus the opaque cursors linking to its neighbours, there are no page numbers or total count
+    def __init__(self, object_list, start_index, has_previous, has_next, previous_cursor='', next_cursor='', query=''):
+        self.object_list = object_list
+        self.start_index = start_index
+        self.end_index = start_index + len(object_list) - 1
+        self.has_previous = has_previous
+        self.has_next = has_next
+        self.previous_cursor = previous_cursor
+        self.next_cursor = next_cursor
+        # the other GET parameters of the page, for the links
+        self.query = query
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def has_other_pages(self):
+        return self.has_previous or self.has_next
+
+
+def encode_cursor(values, position):
+    return base64.urlsafe_b64encode(json.dumps([values, position]).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    # a malformed cursor starts over at the first page
+    try:
+        values, position = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        return list(values), int(position)
+    except (binascii.Error, ValueError, TypeError):
+        return None
+
+
+def seek_filter(ordering, values, forward):
+    # rows after (v1, v2, ...) in the ordering: f1 beyond v1, or f1 = v1 and f2 beyond v2, and so on
+    clauses = []
+    equal = {}
+    for field, value in zip(ordering, values):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') == forward else 'gt'
+        clauses.append(Q(**equal, **{f'{name}__{lookup}': value}))
+        equal[name] = value
+    # the redundant bound on the first field lets the database seek the index instead of filtering from its start
+    first = ordering[0].lstrip('-')
+    bound = 'lte' if ordering[0].startswith('-') == forward else 'gte'
+    return Q(**{f'{first}__{bound}': values[0]}) & reduce(operator.or_, clauses)
+
+
+def other_parameters(request):
+    parameters = request.GET.copy()
+    parameters.pop('after', None)
+    parameters.pop('before', None)
+    return '&' + parameters.urlencode() if parameters else ''
+
+
+def requested_cursor(request):
+    if request.GET.get('before'):
+        return decode_cursor(request.GET['before']), False
+    if request.GET.get('after'):
+        return decode_cursor(request.GET['after']), True
+    return None, True
+
+
+def keyset_page(request, queryset, ordering, size):
+    # ordering has to end in a unique field (the id), deep pages then cost one index seek instead of an OFFSET scan
+    cursor, forward = requested_cursor(request)
+    if cursor is None or len(cursor[0]) != len(ordering):
+        cursor, forward = None, True
+    else:
+        queryset = queryset.filter(seek_filter(ordering, cursor[0], forward))
+    order = ordering if forward else [field[1:] if field.startswith('-') else '-' + field for field in ordering]
+    rows = list(queryset.order_by(*order)[:size + 1])
+    more = len(rows) > size
+    rows = rows[:size]
+
+    if forward:
+        start_index = cursor[1] + 1 if cursor else 1
+        has_previous, has_next = cursor is not None, more
+    else:
+        rows.reverse()
+        start_index = max(cursor[1] - len(rows), 1)
+        has_previous, has_next = more, True
+
+    def values(row):
+        return [getattr(row, field.lstrip('-')) for field in ordering]
+
+    return KeysetPage(
+        rows, start_index, has_previous, has_next,
+        previous_cursor=encode_cursor(values(rows[0]), start_index) if rows else '',
+        next_cursor=encode_cursor(values(rows[-1]), start_index + len(rows) - 1) if rows else '',
+        query=other_parameters(request),
+    )
+
+
+def sequence_page(request, items, size):
+    # same links over a list that is already ranked in memory, the cursor only carries the position
+    cursor, forward = requested_cursor(request)
+    if cursor is None:
+        start = 0
+    elif forward:
+        start = cursor[1]
+    else:
+        start = max(cursor[1] - 1 - size, 0)
+    rows = items[start:start + size]
+    return KeysetPage(
+        rows, start + 1, start > 0, start + size < len(items),
+        previous_cursor=encode_cursor([], start + 1),
+        next_cursor=encode_cursor([], start + len(rows)),
+        query=other_parameters(request),
+    )
+
+
+def ranked_page(request, head, rest, ordering, size):
+    # a short list ranked in memory followed by a queryset. The head is sliced by position like sequence_page, the
+    # rest is sought by keyset from the last row of it shown, which the cursor carries along with the position
+    cursor, forward = requested_cursor(request)
+    values, position = cursor if cursor is not None and len(cursor[0]) in (0, len(ordering)) else ([], 0)
+    if forward:
+        start = position
+        rows = list(head[start:start + size + 1]) if not values else []
+        head_count = len(rows)
+        if len(rows) <= size:
+            tail = rest.filter(seek_filter(ordering, values, True)) if values else rest
+            rows += list(tail.order_by(*ordering)[:size + 1 - len(rows)])
+        has_next = len(rows) > size
+        rows = rows[:size]
+    else:
+        # the cursor is the first row of the page that linked back here: its position, and its values if in the rest
+        rows = []
+        if values:
+            reverse = [field[1:] if field.startswith('-') else '-' + field for field in ordering]
+            rows = list(rest.filter(seek_filter(ordering, values, False)).order_by(*reverse)[:size])[::-1]
+        head_end = position - 1 - len(rows)
+        head_rows = list(head[max(head_end - size + len(rows), 0):head_end]) if len(rows) < size else []
+        head_count = len(head_rows)
+        rows = head_rows + rows
+        start = max(position - 1 - len(rows), 0)
+        has_next = True
+
+    def values_of(number):
+        return [getattr(rows[number], field.lstrip('-')) for field in ordering] if number >= head_count else []
+
+    return KeysetPage(
+        rows, start + 1, start > 0, has_next,
+        previous_cursor=encode_cursor(values_of(0), start + 1) if rows else '',
+        next_cursor=encode_cursor(values_of(len(rows) - 1), start + len(rows)) if rows else '',
+        query=other_parameters(request),
+    )
@@ -0,0 +1,70 @@
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+STOP_WORDS = frozenset('''
+a about above after again against all am an and any are as at be because been before being below between both but by
+can could did do does doing down during each etc few for from further had has have having he her here hers herself him
+himself his how i if in into is it its itself just me more most my myself no nor not now of off on once only or other
+our ours ourselves out over own per same she should so some such than that the their theirs them themselves then there
+these they this those through to too under until up upon us very via was we were what when where which while who whom
+why will with within without would you your yours yourself yourselves
+'''.split())
+VOWELS = frozenset('aeiouy')
+
+
+def remove_stop_words(tokens):
+    return [token for token in tokens if token not in STOP_WORDS]
+
+
+@lru_cache(maxsize=65536)
+def light_stem(token):
+    # S-stemmer plural rules plus -ing/-ed, the latter only when 3+ letters including a vowel are left
+    if len(token) <= 3 or not token.isalpha():
+        return token
+    if token.endswith('ies') and not token.endswith(('eies', 'aies')):
+        token = token[:-3] + 'y'
+    elif token.endswith('es') and not token.endswith(('aes', 'ees', 'oes')):
+        token = token[:-1]
+    elif token.endswith('s') and not token.endswith(('us', 'ss')):
+        token = token[:-1]
+    for suffix in ('ing', 'ed'):
+        stem = token[:-len(suffix)]
+        if token.endswith(suffix) and len(stem) >= 3 and VOWELS & set(stem):
+            if len(stem) > 3 and stem[-1] == stem[-2] and stem[-1] not in 'lsz':
+                stem = stem[:-1]
+            return stem
+    return token
+
+
+def stem_tokens(tokens):
+    return [light_stem(token) for token in tokens]
+
+
+def add_bigrams(tokens):
+    # '_' never survives tokenization, so bigram terms cannot collide with single words
+    return tokens + [first + '_' + second for first, second in zip(tokens, tokens[1:])]
+
+
+TOKEN_STAGES = {
+    'stopwords': remove_stop_words,
+    'stem': stem_tokens,
+    'bigrams': add_bigrams,
+}
+
+
+def analyze(tokens, stages=None):
+    stages = settings.TOKEN_PIPELINE if stages is None else stages
+    for name in stages:
+        try:
+            stage = TOKEN_STAGES[name]
+        except KeyError:
+            raise ImproperlyConfigured(f'Unknown TOKEN_PIPELINE stage {name!r}, expected one of {", ".join(TOKEN_STAGES)}')
+        tokens = stage(tokens)
+    return tokens
+
+
+def pipeline_stamp(stages=None):
+    # stored with every term vector: a vector built by another pipeline has other terms and is rebuilt before use
+    return ','.join(settings.TOKEN_PIPELINE if stages is None else stages)
@@ -0,0 +1,24 @@
+from django.db.models import Exists
+
+from classify_resume.models import CertificateInfo, ProfessionalExperienceInfo, ResumeEducationInfo, \
+    ResumePersonalInfo, SkillInfo
+
+# wizard flag -> section model, in the order of the wizard steps after the personal one
+WIZARD_SECTIONS = {
+    'is_exist_educational': ResumeEducationInfo,
+    'is_exist_professional': ProfessionalExperienceInfo,
+    'is_exist_skills': SkillInfo,
+    'is_exist_certi': CertificateInfo,
+}
+
+
+def resume_progress(user):
+    # the first resume of the user and every wizard flag in one query, sections count across all of the user's
+    # resumes like the separate exists() checks did; without a resume there can be no sections either
+    resume = ResumePersonalInfo.objects.filter(user=user).order_by('id').annotate(**{
+        flag: Exists(model.objects.filter(user_info__user=user)) for flag, model in WIZARD_SECTIONS.items()
+    }).first()
+    progress = {'is_exist_personal': resume is not None}
+    for flag in WIZARD_SECTIONS:
+        progress[flag] = getattr(resume, flag, False)
+    return resume, progress
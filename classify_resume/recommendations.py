@@ -0,0 +1,176 @@
+from itertools import chain
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.utils import timezone
+
+from classify_resume.models import Jobs, JobTermVector
+from classify_resume.pipeline import pipeline_stamp
+from classify_resume.scoring import batch_cosine_scores, rebuild_job_term_vector, hashed_matrix, stored_hashed_vector
+from classify_resume.tasks import enqueue
+
+# Every save of a job rebuilds its vector, so JobTermVector.updated_at is the version of the job. The shared snapshot
+# of the active job vectors and every user's ranked jobs remember when they last looked and only take in the vectors
+# rebuilt since, one edited job never throws the others away.
+
+
+def feed_scorer():
+    return 'hashed' if settings.RESUME_SCORER == 'hashed' else 'cosine'
+
+
+def job_rows(vectors):
+    # what the feed scores per job: a row of the float32 hashed matrix, or the terms and norm for the cosine
+    if feed_scorer() == 'hashed':
+        return hashed_matrix(vectors)
+    return [(vector.terms, vector.norm) for vector in vectors]
+
+
+def score_job_rows(resume_vector, rows):
+    if feed_scorer() == 'hashed':
+        return rows @ stored_hashed_vector(resume_vector)
+    return batch_cosine_scores(resume_vector.terms, resume_vector.norm, rows)
+
+
+def changed_job_vectors(since):
+    # one seek on the updated_at index; a closed job's vector is rebuilt too, a vector of another pipeline does not
+    # count until rebuild_term_vectors has run
+    vectors = JobTermVector.objects.filter(updated_at__gte=since).annotate(active=F('job__is_active'))
+    return [(vector, vector.active and vector.pipeline == pipeline_stamp()) for vector in vectors]
+
+
+def build_missing_job_vectors():
+    # jobs without a vector or with one built by another TOKEN_PIPELINE
+    for job in Jobs.objects.filter(is_active=True).exclude(term_vector__pipeline=pipeline_stamp()):
+        rebuild_job_term_vector(job)
+
+
+def active_job_snapshot():
+    # the ids and scorer rows of the active jobs; the row of a changed, closed or deleted job stays behind with its
+    # id set to -1 and a rebuilt vector is appended, until the entry times out and is built afresh
+    key = f'job-vectors:{feed_scorer()}:{pipeline_stamp()}:{settings.HASHED_VECTOR_DIMENSION}'
+    snapshot = cache.get(key)
+    checked_at = timezone.now()
+    changed = snapshot is None
+    if snapshot is None:
+        build_missing_job_vectors()
+        vectors = list(JobTermVector.objects.filter(job__is_active=True, pipeline=pipeline_stamp()).order_by('job_id'))
+        snapshot = {'ids': np.array([vector.job_id for vector in vectors], dtype=np.int64), 'rows': job_rows(vectors)}
+    else:
+        ids = snapshot['ids']
+        positions = {job_id: position for position, job_id in enumerate(ids.tolist()) if job_id >= 0}
+        updates = changed_job_vectors(snapshot['checked_at'])
+        for vector, _ in updates:
+            if vector.job_id in positions:
+                ids[positions[vector.job_id]] = -1
+        live = [vector for vector, is_live in updates if is_live]
+        if live:
+            snapshot['ids'] = np.concatenate([ids, np.array([vector.job_id for vector in live], dtype=np.int64)])
+            rows = job_rows(live)
+            snapshot['rows'] = np.vstack([snapshot['rows'], rows]) if feed_scorer() == 'hashed' else \
+                snapshot['rows'] + rows
+        changed = bool(updates)
+    # a deleted job leaves no vector behind to notice it by; full rankings scan every job anyway, so they also check
+    # the ids against jobs_active_idx
+    active_ids = list(Jobs.objects.filter(is_active=True).values_list('id', flat=True))
+    deleted = (snapshot['ids'] >= 0) & ~np.isin(snapshot['ids'], active_ids)
+    if changed or deleted.any():
+        snapshot['ids'][deleted] = -1
+        snapshot['checked_at'] = checked_at
+        cache.set(key, snapshot, settings.JOB_FEED_CACHE_TIMEOUT)
+    return snapshot
+
+
+def rank_active_jobs(resume_vector):
+    # scores every active job and keeps the best JOB_FEED_SIZE + JOB_FEED_RESERVE of them; every job left out
+    # scores at most the threshold, None when none was left out
+    snapshot = active_job_snapshot()
+    scores = score_job_rows(resume_vector, snapshot['rows'])
+    live = np.flatnonzero(snapshot['ids'] >= 0)
+    size = min(settings.JOB_FEED_SIZE + settings.JOB_FEED_RESERVE, len(live))
+    top = live[np.argpartition(-scores[live], size - 1)[:size]] if size else live
+    return {
+        'checked_at': snapshot['checked_at'],
+        'threshold': float(scores[top].min()) if size < len(live) else None,
+        'scores': {int(snapshot['ids'][position]): float(scores[position]) for position in top},
+    }
+
+
+def refresh_ranked_jobs(ranked, resume_vector):
+    # only the jobs rebuilt since the last look are scored again. One that scores at most the threshold stays out
+    # like every other job that was left out, so the kept jobs are still the best ones
+    checked_at = timezone.now()
+    updates = changed_job_vectors(ranked['checked_at'])
+    if not updates:
+        return ranked
+    changed_ids = {vector.job_id for vector, _ in updates}
+    scores = {job_id: score for job_id, score in ranked['scores'].items() if job_id not in changed_ids}
+    threshold = ranked['threshold']
+    live = [vector for vector, is_live in updates if is_live]
+    for vector, score in zip(live, score_job_rows(resume_vector, job_rows(live))):
+        if threshold is None or score > threshold:
+            scores[vector.job_id] = float(score)
+    pool = settings.JOB_FEED_SIZE + settings.JOB_FEED_RESERVE
+    if len(scores) > pool:
+        ordered = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        dropped = ordered[pool][1]
+        threshold = dropped if threshold is None else max(threshold, dropped)
+        scores = dict(ordered[:pool])
+    return {'checked_at': checked_at, 'threshold': threshold, 'scores': scores}
+
+
+def recommended_job_ids(resume_vector):
+    key = f'job-feed:{resume_vector.resume_id}:{resume_vector.updated_at.timestamp()}:{feed_scorer()}:' \
+          f'{pipeline_stamp()}'
+    stored = cache.get(key)
+    ranked = refresh_ranked_jobs(stored, resume_vector) if stored is not None else None
+    while True:
+        if ranked is None or ranked['threshold'] is not None and len(ranked['scores']) < settings.JOB_FEED_SIZE:
+            # a new resume vector, or so many of the kept jobs closed that the feed cannot be filled from them
+            ranked = rank_active_jobs(resume_vector)
+        scores = ranked['scores']
+        job_ids = sorted(scores, key=lambda job_id: (-scores[job_id], job_id))[:settings.JOB_FEED_SIZE]
+        # deleted jobs have no vector left to be noticed by
+        gone = set(job_ids) - set(Jobs.objects.filter(is_active=True, id__in=job_ids).values_list('id', flat=True))
+        if not gone:
+            break
+        ranked = {**ranked, 'scores': {job_id: score for job_id, score in scores.items() if job_id not in gone}}
+    if ranked is not stored:
+        cache.set(key, ranked, settings.JOB_FEED_CACHE_TIMEOUT)
+    return job_ids
+
+
+class RankedJobs:
+    # the still active ones of the ranked job ids, in their order, loaded only for the positions sliced
+    def __init__(self, job_ids):
+        self.job_ids = job_ids
+
+    def __getitem__(self, positions):
+        job_ids = self.job_ids[positions]
+        jobs = Jobs.objects.filter(is_active=True).in_bulk(job_ids)
+        return [jobs[job_id] for job_id in job_ids if job_id in jobs]
+
+
+class RankedJobFeed:
+    # the ranked head first, then every other active job newest first, so none is out of reach. The head is paged by
+    # position and the rest by keyset on the ordering, see pagination.ranked_page
+    ordering = ['-id']
+
+    def __init__(self, job_ids):
+        self.head = RankedJobs(job_ids)
+        self.rest = Jobs.objects.filter(is_active=True).exclude(id__in=job_ids)
+
+    def __iter__(self):
+        return chain(self.head[:], self.rest.order_by(*self.ordering).iterator())
+
+
+def recommended_jobs(resume):
+    resume_vector = getattr(resume, 'term_vector', None) if resume else None
+    if resume_vector is not None and resume_vector.pipeline != pipeline_stamp():
+        # not ranked against jobs of another pipeline, the plain list is shown until the rebuild has run
+        enqueue('rebuild_resume_term_vector', resume_id=resume.id)
+        resume_vector = None
+    if resume_vector is None or resume_vector.norm == 0:
+        return Jobs.objects.filter(is_active=True)
+    return RankedJobFeed(recommended_job_ids(resume_vector))
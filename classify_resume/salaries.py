@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, Q
+
+from classify_resume.models import AppliedJob, Jobs
+
+# upper end of the last bucket, salaries above it are not counted
+SALARY_CEILING = 999999999
+
+
+def salary_ranges(job):
+    ranges = []
+    lower = 0
+    for bound in job.salary_buckets or settings.SALARY_HISTOGRAM_BOUNDS:
+        ranges.append((lower, bound))
+        lower = bound + 1
+    ranges.append((lower, SALARY_CEILING))
+    return ranges
+
+
+def salary_histogram(job):
+    # [(label, count)] over the job's current applications, one conditional count per bucket in a single query
+    ranges = salary_ranges(job)
+    key = f"salary-histogram:{job.id}:{job.applications_version}:{'-'.join(str(upper) for _, upper in ranges)}"
+    histogram = cache.get(key)
+    if histogram is None:
+        counts = AppliedJob.objects.filter(apply_job=job, is_deleted=False).aggregate(**{
+            f'bucket_{position}': Count('id', filter=Q(expected_salary__range=salary_range))
+            for position, salary_range in enumerate(ranges)
+        })
+        histogram = [
+            (f'{lower}-{upper}', counts[f'bucket_{position}']) for position, (lower, upper) in enumerate(ranges)
+        ]
+        cache.set(key, histogram, settings.SALARY_HISTOGRAM_CACHE_TIMEOUT)
+    return histogram
+
+
+def bump_applications_version(job_id):
+    # update() skips the Jobs signals, so this does not rebuild the job vector
+    Jobs.objects.filter(pk=job_id).update(applications_version=F('applications_version') + 1)
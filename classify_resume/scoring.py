@@ -0,0 +1,440 @@
+import math
+import re
+import zlib
+
+from collections import Counter
+from functools import lru_cache
+
+import html2text
+import numpy as np
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.models import F
+from scipy import sparse
+
+from classify_resume.models import ResumePersonalInfo, ResumeTermVector, TermDocumentFrequency, CorpusStatistics, \
+    AppliedJob, JobTermVector, ResumeSectionVector
+from classify_resume.pipeline import analyze, pipeline_stamp
+from classify_resume.tokenizer import html_tokens
+
+
+# section -> (related name on ResumePersonalInfo, text field); the experience section is ResumeTermVector
+RESUME_SECTIONS = {
+    'skills': ('user_skill_info', 'skill_type'),
+    'education': ('user_education_info', 'degree_description'),
+    'certificates': ('user_cert_info', 'cert_description'),
+}
+
+
+def preprocess_text(text):
+    return re.sub(r'[^a-zA-Z0-9\s]', '', text.lower())
+
+
+def calculate_cosine_similarity(text1, text2):
+    text1 = preprocess_text(text1)
+    text2 = preprocess_text(text2)
+
+    words1 = Counter(text1.split())
+    words2 = Counter(text2.split())
+
+    intersection = set(words1.keys()) & set(words2.keys())
+
+    dot_product = sum(words1[word] * words2[word] for word in intersection)
+    magnitude1 = math.sqrt(sum(words1[word] ** 2 for word in words1.keys()))
+    magnitude2 = math.sqrt(sum(words2[word] ** 2 for word in words2.keys()))
+
+    if magnitude1 == 0 or magnitude2 == 0:
+        return 0
+
+    return dot_product / (magnitude1 * magnitude2)
+
+
+def ckeditor_clean(text):
+    # unwrapped, so the words of the stored text never depend on where html2text would break a line
+    return html2text.html2text(text, bodywidth=0)
+
+
+def text_to_terms(text, stages=None):
+    # html_tokens gives the words of preprocess_text(ckeditor_clean(text)) without building the markdown,
+    # every stored vector then goes through the same TOKEN_PIPELINE
+    return Counter(analyze(html_tokens(text), stages))
+
+
+def vector_norm(terms):
+    return math.sqrt(sum(count ** 2 for count in terms.values()))
+
+
+def cosine_from_vectors(terms1, norm1, terms2, norm2):
+    if norm1 == 0 or norm2 == 0:
+        return 0
+    if len(terms1) > len(terms2):
+        terms1, terms2 = terms2, terms1
+    dot_product = sum(count * terms2.get(word, 0) for word, count in terms1.items())
+    return dot_product / (norm1 * norm2)
+
+
+@lru_cache(maxsize=65536)
+def term_hash(term):
+    # crc32 is stable across processes (unlike hash()), the top bit picks the sign so collisions cancel on average
+    value = zlib.crc32(term.encode())
+    return value & 0x7FFFFFFF, 1.0 if value >> 31 else -1.0
+
+
+def hashed_vector(terms, dimension=None):
+    # feature hashing: unit length float32 vector of fixed dimension, so cosine becomes a plain dot product
+    vector = np.zeros(dimension or settings.HASHED_VECTOR_DIMENSION, dtype=np.float32)
+    for term, count in terms.items():
+        bucket, sign = term_hash(term)
+        vector[bucket % vector.size] += sign * count
+    norm = np.linalg.norm(vector)
+    if norm:
+        vector /= norm
+    return vector
+
+
+def stored_hashed_vector(vector):
+    # vectors stored before HASHED_VECTOR_DIMENSION changed are re-hashed from their terms
+    array = np.frombuffer(vector.hashed or b'', dtype=np.float32)
+    if array.size != settings.HASHED_VECTOR_DIMENSION:
+        array = hashed_vector(vector.terms)
+    return array
+
+
+def hashed_matrix(vectors):
+    if not vectors:
+        return np.zeros((0, settings.HASHED_VECTOR_DIMENSION), dtype=np.float32)
+    return np.vstack([stored_hashed_vector(vector) for vector in vectors])
+
+
+def term_matrix(job_terms, term_dicts):
+    # terms outside the job vocabulary never reach a dot product, so the matrix only gets one column per job term
+    vocabulary = {term: column for column, term in enumerate(job_terms)}
+    indptr = [0]
+    indices = []
+    data = []
+    for terms in term_dicts:
+        for term, count in terms.items():
+            column = vocabulary.get(term)
+            if column is not None:
+                indices.append(column)
+                data.append(count)
+        indptr.append(len(indices))
+
+    return sparse.csr_matrix(
+        (np.asarray(data, dtype=np.float64), np.asarray(indices, dtype=np.int32), np.asarray(indptr, dtype=np.int64)),
+        shape=(len(indptr) - 1, len(vocabulary))
+    )
+
+
+def batch_cosine_scores(job_terms, job_norm, vectors):
+    # vectors is a sequence of (terms, norm) pairs
+    scores = np.zeros(len(vectors))
+    if not vectors or job_norm == 0:
+        return scores
+
+    matrix = term_matrix(job_terms, [terms for terms, _ in vectors])
+    job_vector = np.fromiter(job_terms.values(), dtype=np.float64, count=len(job_terms))
+    norms = np.fromiter((norm for _, norm in vectors), dtype=np.float64, count=len(vectors))
+
+    dots = matrix @ job_vector
+    nonzero = norms > 0
+    scores[nonzero] = dots[nonzero] / (norms[nonzero] * job_norm)
+    return scores
+
+
+def corpus_snapshot(terms):
+    # the corpus totals and the document frequency of every given term, several jobs can share one snapshot
+    terms = list(terms)
+    corpus = CorpusStatistics.objects.filter(pk=1).first() or CorpusStatistics()
+    frequencies = {}
+    for start in range(0, len(terms), 500):
+        frequencies.update(TermDocumentFrequency.objects.filter(term__in=terms[start:start + 500])
+                           .values_list('term', 'document_count'))
+    return corpus, frequencies
+
+
+def corpus_statistics(job_terms, snapshot=None):
+    corpus, frequencies = snapshot or corpus_snapshot(job_terms)
+    document_frequency = np.fromiter((frequencies.get(term, 0) for term in job_terms), dtype=np.float64,
+                                     count=len(job_terms))
+    average_length = corpus.total_length / corpus.document_count if corpus.document_count else 0
+    return corpus.document_count, average_length, document_frequency
+
+
+def batch_tfidf_scores(job_terms, vectors, statistics):
+    # idf only weights the job side (SMART nnc.ltc), so stored resume vectors and norms never go stale when idf drifts
+    scores = np.zeros(len(vectors))
+    if not vectors or not job_terms:
+        return scores
+
+    document_count, _, document_frequency = statistics
+    idf = np.log((document_count + 1) / (document_frequency + 1)) + 1
+    job_vector = np.fromiter(job_terms.values(), dtype=np.float64, count=len(job_terms)) * idf
+    job_norm = np.linalg.norm(job_vector)
+    norms = np.fromiter((vector.norm for vector in vectors), dtype=np.float64, count=len(vectors))
+
+    dots = term_matrix(job_terms, [vector.terms for vector in vectors]) @ job_vector
+    nonzero = norms > 0
+    scores[nonzero] = dots[nonzero] / (norms[nonzero] * job_norm)
+    return scores
+
+
+def batch_bm25_scores(job_terms, vectors, statistics):
+    scores = np.zeros(len(vectors))
+    if not vectors or not job_terms:
+        return scores
+
+    document_count, average_length, document_frequency = statistics
+    k1 = settings.BM25_K1
+    b = settings.BM25_B
+    idf = np.log(1 + (document_count - document_frequency + 0.5) / (document_frequency + 0.5))
+    job_vector = np.fromiter(job_terms.values(), dtype=np.float64, count=len(job_terms)) * idf
+
+    matrix = term_matrix(job_terms, [vector.terms for vector in vectors])
+    lengths = np.fromiter((vector.length for vector in vectors), dtype=np.float64, count=len(vectors))
+    relative_lengths = lengths / average_length if average_length else np.ones(len(vectors))
+    row_lengths = np.repeat(relative_lengths, np.diff(matrix.indptr))
+    matrix.data = matrix.data * (k1 + 1) / (matrix.data + k1 * (1 - b + b * row_lengths))
+    return matrix @ job_vector
+
+
+def section_vectors(resume_ids):
+    sections = {}
+    stale = []
+    section_rows = ResumeSectionVector.objects.filter(resume_id__in=resume_ids)
+    for resume_id, section, terms, norm, pipeline in section_rows.values_list(
+            'resume_id', 'section', 'terms', 'norm', 'pipeline'):
+        sections[resume_id, section] = (terms, norm)
+        if pipeline != pipeline_stamp():
+            stale.append((resume_id, section))
+    # sections built with another TOKEN_PIPELINE are rebuilt before they are compared with the job
+    if stale:
+        resumes = ResumePersonalInfo.objects.in_bulk({resume_id for resume_id, _ in stale})
+        for resume_id, section in stale:
+            vector = rebuild_resume_section_vector(resumes[resume_id], section)
+            sections[resume_id, section] = (vector.terms, vector.norm)
+    return sections
+
+
+def batch_multifield_scores(job_terms, vectors, sections=None):
+    weights = settings.RESUME_SECTION_WEIGHTS
+    total_weight = sum(weights.values())
+    job_norm = vector_norm(job_terms)
+    if not vectors or not total_weight:
+        return np.zeros(len(vectors))
+
+    if sections is None:
+        sections = section_vectors([vector.resume_id for vector in vectors])
+    scores = weights.get('experience', 0) * batch_cosine_scores(
+        job_terms, job_norm, [(vector.terms, vector.norm) for vector in vectors]
+    )
+    for section in RESUME_SECTIONS:
+        if weights.get(section):
+            scores += weights[section] * batch_cosine_scores(
+                job_terms, job_norm, [sections.get((vector.resume_id, section), ({}, 0)) for vector in vectors]
+            )
+    return scores / total_weight
+
+
+def scorer_snapshot(scorer, terms, vectors):
+    # what a scorer reads besides the vectors, loaded once when the same vectors are scored against many jobs
+    if scorer in ('tfidf', 'bm25'):
+        return corpus_snapshot(terms)
+    if scorer == 'multifield':
+        return section_vectors([vector.resume_id for vector in vectors])
+    return None
+
+
+def score_term_vectors(job_terms, vectors, scorer=None, snapshot=None):
+    # vectors are ResumeTermVector rows (or unsaved stand-ins for applicants without one), snapshot a
+    # scorer_snapshot covering job_terms and vectors when the caller already has one
+    scorer = scorer or settings.RESUME_SCORER
+    if scorer == 'cosine':
+        return batch_cosine_scores(job_terms, vector_norm(job_terms), [(vector.terms, vector.norm) for vector in vectors])
+    if scorer == 'hashed':
+        return hashed_matrix(vectors) @ hashed_vector(job_terms)
+    if scorer == 'tfidf':
+        return batch_tfidf_scores(job_terms, vectors, corpus_statistics(job_terms, snapshot))
+    if scorer == 'bm25':
+        return batch_bm25_scores(job_terms, vectors, corpus_statistics(job_terms, snapshot))
+    if scorer == 'multifield':
+        return batch_multifield_scores(job_terms, vectors, snapshot)
+    raise ImproperlyConfigured(
+        f'Unknown RESUME_SCORER {scorer!r}, expected cosine, hashed, tfidf, bm25 or multifield'
+    )
+
+
+def resume_experience_terms(resume):
+    terms = Counter()
+    for info in resume.user_professional_info.all():
+        terms.update(text_to_terms(info.official_description))
+    return terms
+
+
+def rebuild_resume_section_vector(resume, section):
+    related_name, field = RESUME_SECTIONS[section]
+    terms = text_to_terms('\n'.join(getattr(row, field) for row in getattr(resume, related_name).all()))
+    vector, _ = ResumeSectionVector.objects.update_or_create(
+        resume=resume,
+        section=section,
+        defaults={'terms': dict(terms), 'norm': vector_norm(terms), 'pipeline': pipeline_stamp()}
+    )
+    return vector
+
+
+def rebuild_resume_section_vector_by_id(resume_id, section):
+    resume = ResumePersonalInfo.objects.filter(pk=resume_id).first()
+    if resume is not None:
+        rebuild_resume_section_vector(resume, section)
+        # only the multi-field scorer reads section vectors
+        if settings.RESUME_SCORER == 'multifield':
+            rescore_user_applications(resume.user_id)
+
+
+def update_corpus_statistics(added_terms, removed_terms, added_documents, added_length):
+    if added_terms:
+        TermDocumentFrequency.objects.bulk_create(
+            [TermDocumentFrequency(term=term) for term in added_terms], ignore_conflicts=True
+        )
+        TermDocumentFrequency.objects.filter(term__in=added_terms).update(document_count=F('document_count') + 1)
+    if removed_terms:
+        TermDocumentFrequency.objects.filter(term__in=removed_terms).update(document_count=F('document_count') - 1)
+    if added_documents or added_length:
+        CorpusStatistics.objects.get_or_create(pk=1)
+        CorpusStatistics.objects.filter(pk=1).update(
+            document_count=F('document_count') + added_documents,
+            total_length=F('total_length') + added_length,
+        )
+
+
+def rebuild_resume_term_vector(resume):
+    terms = resume_experience_terms(resume)
+    with transaction.atomic():
+        previous = ResumeTermVector.objects.select_for_update().filter(resume=resume).first()
+        vector, created = ResumeTermVector.objects.update_or_create(
+            resume=resume,
+            defaults={
+                'terms': dict(terms),
+                'norm': vector_norm(terms),
+                'length': sum(terms.values()),
+                'hashed': hashed_vector(terms).tobytes(),
+                'pipeline': pipeline_stamp(),
+            }
+        )
+        previous_terms = set(previous.terms) if previous else set()
+        update_corpus_statistics(
+            list(set(terms) - previous_terms),
+            list(previous_terms - set(terms)),
+            1 if created else 0,
+            vector.length - (previous.length if previous else 0),
+        )
+    return vector
+
+
+def discard_resume_term_vector(vector):
+    update_corpus_statistics([], list(vector.terms), -1, -vector.length)
+
+
+def recount_corpus_statistics():
+    document_frequency = Counter()
+    total_length = 0
+    document_count = 0
+    for terms, length in ResumeTermVector.objects.values_list('terms', 'length').iterator(chunk_size=500):
+        document_frequency.update(terms.keys())
+        total_length += length
+        document_count += 1
+
+    with transaction.atomic():
+        TermDocumentFrequency.objects.all().delete()
+        TermDocumentFrequency.objects.bulk_create(
+            [TermDocumentFrequency(term=term, document_count=count) for term, count in document_frequency.items()],
+            batch_size=1000
+        )
+        CorpusStatistics.objects.update_or_create(
+            pk=1, defaults={'document_count': document_count, 'total_length': total_length}
+        )
+
+
+def rebuild_resume_term_vector_by_id(resume_id):
+    # the resume may be gone by the time a cascaded delete commits
+    resume = ResumePersonalInfo.objects.filter(pk=resume_id).first()
+    if resume is not None:
+        rebuild_resume_term_vector(resume)
+        rescore_user_applications(resume.user_id)
+
+
+def applicant_term_vectors(user_ids, build_missing=True):
+    # mirrors `user.user_resume.first()`: the lowest resume id of each user is the one that gets scored
+    resumes = {}
+    for resume in ResumePersonalInfo.objects.filter(user_id__in=user_ids).select_related('term_vector').order_by('-id'):
+        resumes[resume.user_id] = resume
+
+    vectors = {}
+    for user_id, resume in resumes.items():
+        vector = getattr(resume, 'term_vector', None)
+        # missing vectors and ones built with another TOKEN_PIPELINE are built now, or left out by read-only callers
+        if vector is None or vector.pipeline != pipeline_stamp():
+            if not build_missing:
+                continue
+            vector = rebuild_resume_term_vector(resume)
+        vectors[user_id] = vector
+    return vectors
+
+
+def rebuild_job_term_vector(job):
+    terms = text_to_terms(job.job_description)
+    vector, _ = JobTermVector.objects.update_or_create(
+        job=job,
+        defaults={
+            'terms': dict(terms),
+            'norm': vector_norm(terms),
+            'hashed': hashed_vector(terms).tobytes(),
+            'pipeline': pipeline_stamp(),
+        }
+    )
+    return vector
+
+
+def job_term_vector(job):
+    # like stored_hashed_vector, a vector built with another TOKEN_PIPELINE is rebuilt instead of compared
+    vector = getattr(job, 'term_vector', None)
+    if vector is None or vector.pipeline != pipeline_stamp():
+        vector = rebuild_job_term_vector(job)
+    return vector
+
+
+def score_applications(job, applications, build_missing=True):
+    job_terms = Counter(job_term_vector(job).terms)
+    term_vectors = applicant_term_vectors([application.user_id for application in applications], build_missing)
+    resume_vectors = [term_vectors.get(application.user_id, ResumeTermVector()) for application in applications]
+    for application, score in zip(applications, score_term_vectors(job_terms, resume_vectors)):
+        application.similarity_score = float(score)
+    return applications
+
+
+def rescore_job_applications(job):
+    applications = score_applications(job, list(job.user_apply_job.all()))
+    AppliedJob.objects.bulk_update(applications, ['similarity_score'], batch_size=500)
+    return len(applications)
+
+
+def rescore_user_applications(user_id):
+    # one resume vector against every job the user applied to: the job vectors come with the applications
+    # and whatever else the scorer reads is loaded once for all of them
+    applications = list(AppliedJob.objects.filter(user_id=user_id).select_related('apply_job__term_vector'))
+    if not applications:
+        return 0
+    resume_vector = applicant_term_vectors([user_id]).get(user_id, ResumeTermVector())
+    job_terms = {}
+    for application in applications:
+        if application.apply_job_id not in job_terms:
+            job_terms[application.apply_job_id] = Counter(job_term_vector(application.apply_job).terms)
+    snapshot = scorer_snapshot(
+        settings.RESUME_SCORER, {term for terms in job_terms.values() for term in terms}, [resume_vector]
+    )
+    for application in applications:
+        score, = score_term_vectors(job_terms[application.apply_job_id], [resume_vector], snapshot=snapshot)
+        application.similarity_score = float(score)
+    AppliedJob.objects.bulk_update(applications, ['similarity_score'], batch_size=500)
+    return len(applications)
@@ -0,0 +1,98 @@
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from classify_resume.models import Jobs
+from classify_resume.pipeline import STOP_WORDS
+
+# classify_resume_jobsearch is the FTS5 table of active jobs that the 0029 migration's triggers keep in sync.
+# Matches are marked with control characters that cannot occur in the text, so the text can be escaped first
+MATCH_START = '\x02'
+MATCH_END = '\x03'
+
+
+def match_expression(query):
+    # every word quoted so user input is never read as FTS5 syntax; the last one is a prefix, it may still be typed
+    terms = re.findall(r'\w+', query.lower())
+    terms = ([term for term in terms if term not in STOP_WORDS] or terms)[:settings.JOB_SEARCH_MAX_TERMS]
+    return ' '.join(f'"{term}"' for term in terms) + '*' if terms else ''
+
+
+def highlighted(text):
+    return mark_safe(escape(text).replace(MATCH_START, '<mark>').replace(MATCH_END, '</mark>'))
+
+
+class SearchResults(list):
+    # ranked jobs plus how many jobs matched; truncated when there were more than JOB_SEARCH_CANDIDATES matches
+    # and only the newest of them were ranked
+    def __init__(self, jobs=(), matches=0, truncated=False):
+        super().__init__(jobs)
+        self.matches = matches
+        self.truncated = truncated
+
+
+def count_matches(expression):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT count(*) FROM classify_resume_jobsearch WHERE classify_resume_jobsearch MATCH %s', [expression]
+        )
+        return cursor.fetchone()[0]
+
+
+def ranked_job_ids(expression, limit, matches):
+    # a selective query has every match ranked by bm25. Only a word found in most jobs goes over
+    # JOB_SEARCH_CANDIDATES, and then just the newest matches are scored so ranking cost stays flat
+    with connection.cursor() as cursor:
+        if matches > settings.JOB_SEARCH_CANDIDATES:
+            cursor.execute(
+                'SELECT id FROM ('
+                'SELECT rowid AS id, bm25(classify_resume_jobsearch, %s, 1.0) AS score FROM classify_resume_jobsearch '
+                'WHERE classify_resume_jobsearch MATCH %s ORDER BY rowid DESC LIMIT %s'
+                ') ORDER BY score LIMIT %s',
+                [settings.JOB_SEARCH_TITLE_WEIGHT, expression, settings.JOB_SEARCH_CANDIDATES, limit]
+            )
+        else:
+            cursor.execute(
+                'SELECT rowid FROM classify_resume_jobsearch WHERE classify_resume_jobsearch MATCH %s '
+                'ORDER BY bm25(classify_resume_jobsearch, %s, 1.0) LIMIT %s',
+                [expression, settings.JOB_SEARCH_TITLE_WEIGHT, limit]
+            )
+        return [job_id for job_id, in cursor.fetchall()]
+
+
+def job_highlights(expression, job_ids):
+    # one more pass over the matches between the lowest and highest id, highlighting only the ranked ones.
+    # 'rowid IN (...)' in the WHERE clause would run the MATCH again for every id
+    placeholders = ', '.join(['%s'] * len(job_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT rowid, '
+            f'CASE WHEN rowid IN ({placeholders}) THEN highlight(classify_resume_jobsearch, 0, %s, %s) END, '
+            f'CASE WHEN rowid IN ({placeholders}) THEN snippet(classify_resume_jobsearch, 1, %s, %s, %s, %s) END '
+            f'FROM classify_resume_jobsearch WHERE classify_resume_jobsearch MATCH %s AND rowid BETWEEN %s AND %s',
+            [*job_ids, MATCH_START, MATCH_END, *job_ids, MATCH_START, MATCH_END, '…',
+             settings.JOB_SEARCH_SNIPPET_WORDS, expression, min(job_ids), max(job_ids)]
+        )
+        return {job_id: (title, snippet) for job_id, title, snippet in cursor.fetchall() if title is not None}
+
+
+def search_jobs(query, limit=None):
+    expression = match_expression(query)
+    matches = count_matches(expression) if expression else 0
+    if not matches:
+        return SearchResults()
+    job_ids = ranked_job_ids(expression, limit or settings.JOB_SEARCH_LIMIT, matches)
+    highlights = job_highlights(expression, job_ids)
+    jobs = Jobs.objects.filter(is_active=True).in_bulk(job_ids)
+    results = SearchResults(matches=matches, truncated=matches > settings.JOB_SEARCH_CANDIDATES)
+    for job_id in job_ids:
+        if job_id in jobs and job_id in highlights:
+            job = jobs[job_id]
+            title, snippet = highlights[job_id]
+            job.highlighted_title = highlighted(title)
+            job.snippet = highlighted(snippet)
+            results.append(job)
+    return results
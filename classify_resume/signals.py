@@ -0,0 +1,95 @@
+from functools import partial
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver
+
+from classify_resume.ann_index import record_resume_change
+from classify_resume.duplicates import rebuild_resume_signature_by_id
+from classify_resume.middleware import current_resume_key
+from classify_resume.models import ProfessionalExperienceInfo, ResumeTermVector, Jobs, SkillInfo, \
+    ResumeEducationInfo, CertificateInfo, ResumePersonalInfo, AppliedJob
+from classify_resume.salaries import bump_applications_version
+from classify_resume.scoring import discard_resume_term_vector, rebuild_job_term_vector, ckeditor_clean
+from classify_resume.skills import job_required_skills, rebuild_resume_skill_tags_by_id
+from classify_resume.tasks import enqueue
+
+SECTION_BY_MODEL = {
+    SkillInfo: 'skills',
+    ResumeEducationInfo: 'education',
+    CertificateInfo: 'certificates',
+}
+
+
+def resume_section_changed(model, resume_id):
+    # what a write to rows of one resume section schedules; also called once per batch by the bulk inserts,
+    # which send no model signals
+    if model is ProfessionalExperienceInfo:
+        # rescores every application of the user, too slow for the request
+        enqueue('rebuild_resume_term_vector', resume_id=resume_id)
+    if model in SECTION_BY_MODEL:
+        enqueue('rebuild_resume_section_vector', resume_id=resume_id, section=SECTION_BY_MODEL[model])
+    if model in (ProfessionalExperienceInfo, SkillInfo):
+        transaction.on_commit(partial(rebuild_resume_skill_tags_by_id, resume_id))
+    transaction.on_commit(partial(rebuild_resume_signature_by_id, resume_id))
+
+
+@receiver(post_save, sender=ProfessionalExperienceInfo)
+@receiver(post_delete, sender=ProfessionalExperienceInfo)
+@receiver(post_save, sender=SkillInfo)
+@receiver(post_delete, sender=SkillInfo)
+@receiver(post_save, sender=ResumeEducationInfo)
+@receiver(post_delete, sender=ResumeEducationInfo)
+@receiver(post_save, sender=CertificateInfo)
+@receiver(post_delete, sender=CertificateInfo)
+def refresh_resume_section(sender, instance, **kwargs):
+    resume_section_changed(sender, instance.user_info_id)
+
+
+@receiver(post_save, sender=ResumePersonalInfo)
+def refresh_personal_info_signature(sender, instance, **kwargs):
+    transaction.on_commit(partial(rebuild_resume_signature_by_id, instance.pk))
+
+
+@receiver(post_save, sender=ResumePersonalInfo)
+@receiver(post_delete, sender=ResumePersonalInfo)
+def invalidate_current_resume(sender, instance, **kwargs):
+    transaction.on_commit(partial(cache.delete, current_resume_key(instance.user_id)))
+
+
+@receiver(post_delete, sender=ResumeTermVector)
+def discount_resume_term_vector(sender, instance, **kwargs):
+    discard_resume_term_vector(instance)
+
+
+@receiver(post_save, sender=ResumeTermVector)
+@receiver(post_delete, sender=ResumeTermVector)
+def log_ann_index_change(sender, instance, **kwargs):
+    transaction.on_commit(partial(record_resume_change, instance.resume_id))
+
+
+@receiver(post_save, sender=AppliedJob)
+@receiver(post_delete, sender=AppliedJob)
+def invalidate_salary_histogram(sender, instance, created=False, update_fields=None, **kwargs):
+    # score and status updates leave the histogram alone
+    if created or update_fields is None or {'is_deleted', 'expected_salary'} & set(update_fields):
+        bump_applications_version(instance.apply_job_id)
+
+
+@receiver(post_save, sender=Jobs)
+def refresh_job_term_vector(sender, instance, **kwargs):
+    rebuild_job_term_vector(instance)
+
+
+@receiver(pre_save, sender=Jobs)
+def clean_job_description(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or 'job_description' in update_fields:
+        instance.job_description_text = ckeditor_clean(instance.job_description or '')
+        instance.required_skills = job_required_skills(instance)
+
+
+@receiver(pre_save, sender=ProfessionalExperienceInfo)
+def clean_official_description(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or 'official_description' in update_fields:
+        instance.official_description_text = ckeditor_clean(instance.official_description or '')
@@ -0,0 +1,163 @@
+from collections import deque
+from functools import lru_cache
+
+from classify_resume.models import ResumePersonalInfo, ResumeSkillTag
+
+# canonical skill -> lowercase spellings found in job descriptions and resumes
+SKILL_TAXONOMY = {
+    'Python': ['python', 'python3'],
+    'Django': ['django'],
+    'Flask': ['flask'],
+    'FastAPI': ['fastapi'],
+    'JavaScript': ['javascript', 'js', 'ecmascript'],
+    'TypeScript': ['typescript'],
+    'Node.js': ['node.js', 'nodejs', 'node js'],
+    'React': ['react', 'react.js', 'reactjs'],
+    'Angular': ['angular', 'angularjs'],
+    'Vue.js': ['vue', 'vue.js', 'vuejs'],
+    'HTML': ['html', 'html5'],
+    'CSS': ['css', 'css3'],
+    'Bootstrap': ['bootstrap'],
+    'Java': ['java'],
+    'Spring': ['spring', 'spring boot', 'springboot'],
+    'Kotlin': ['kotlin'],
+    'C++': ['c++', 'cpp'],
+    'C#': ['c#', 'csharp'],
+    '.NET': ['.net', 'dotnet', 'asp.net'],
+    'Go': ['golang'],
+    'Rust': ['rust'],
+    'PHP': ['php'],
+    'Laravel': ['laravel'],
+    'Ruby': ['ruby'],
+    'Ruby on Rails': ['rails', 'ruby on rails', 'ror'],
+    'Swift': ['swift'],
+    'Android': ['android'],
+    'iOS': ['ios'],
+    'Flutter': ['flutter'],
+    'SQL': ['sql'],
+    'PostgreSQL': ['postgresql', 'postgres', 'psql'],
+    'MySQL': ['mysql'],
+    'SQLite': ['sqlite'],
+    'MongoDB': ['mongodb', 'mongo'],
+    'Redis': ['redis'],
+    'Elasticsearch': ['elasticsearch', 'elastic search'],
+    'Docker': ['docker'],
+    'Kubernetes': ['kubernetes', 'k8s'],
+    'AWS': ['aws', 'amazon web services'],
+    'Azure': ['azure'],
+    'Google Cloud': ['gcp', 'google cloud'],
+    'Linux': ['linux'],
+    'Git': ['git', 'github', 'gitlab'],
+    'CI/CD': ['ci/cd', 'continuous integration', 'jenkins', 'github actions'],
+    'REST': ['rest', 'restful', 'rest api', 'rest apis'],
+    'GraphQL': ['graphql'],
+    'Machine Learning': ['machine learning', 'ml'],
+    'Deep Learning': ['deep learning'],
+    'TensorFlow': ['tensorflow'],
+    'PyTorch': ['pytorch'],
+    'Pandas': ['pandas'],
+    'NumPy': ['numpy'],
+    'Data Analysis': ['data analysis', 'data analytics'],
+    'Excel': ['excel', 'ms excel'],
+    'Power BI': ['power bi', 'powerbi'],
+    'Tableau': ['tableau'],
+    'Photoshop': ['photoshop'],
+    'Figma': ['figma'],
+    'SEO': ['seo', 'search engine optimization'],
+    'Agile': ['agile', 'scrum', 'kanban'],
+    'Project Management': ['project management'],
+    'Communication': ['communication skills'],
+}
+
+
+class SkillMatcher:
+    # Aho-Corasick automaton over the lowercase skill spellings, matches are kept only on word boundaries
+    def __init__(self, taxonomy):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+        for canonical, spellings in taxonomy.items():
+            for spelling in spellings:
+                self._add(spelling.lower(), canonical)
+        self._link()
+
+    def _add(self, pattern, canonical):
+        state = 0
+        for char in pattern:
+            if char not in self.goto[state]:
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+                self.goto[state][char] = len(self.goto) - 1
+            state = self.goto[state][char]
+        self.output[state].append((len(pattern), canonical))
+
+    def _link(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self.goto[state].items():
+                queue.append(child)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(char, 0)
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+
+    def find(self, text):
+        text = text.lower()
+        end = len(text)
+        matches = []
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(char, 0)
+            for length, canonical in self.output[state]:
+                start = position - length + 1
+                if (start == 0 or not text[start - 1].isalnum()) and \
+                        (position + 1 == end or not text[position + 1].isalnum()):
+                    matches.append((start, -length, canonical))
+
+        # leftmost-longest: a match inside or across an already chosen one is dropped, so 'node.js' is not
+        # also JavaScript and 'ruby on rails' is not also Ruby
+        found = set()
+        covered = 0
+        for start, length, canonical in sorted(matches):
+            if start >= covered:
+                found.add(canonical)
+                covered = start - length
+        return sorted(found)
+
+
+@lru_cache(maxsize=None)
+def skill_matcher():
+    return SkillMatcher(SKILL_TAXONOMY)
+
+
+def extract_skills(text):
+    return skill_matcher().find(text or '')
+
+
+def job_required_skills(job):
+    return extract_skills(job.job_description_text)
+
+
+def rebuild_resume_skill_tags(resume):
+    experience = '\n'.join(info.official_description_text for info in resume.user_professional_info.all())
+    skills = set(extract_skills(experience))
+    for skill_info in resume.user_skill_info.all():
+        skill_type = skill_info.skill_type.strip()
+        # skills outside the taxonomy are still tagged under the name the applicant typed
+        skills.update(extract_skills(skill_type) or ([skill_type] if skill_type else []))
+
+    existing = set(resume.skill_tags.values_list('skill', flat=True))
+    resume.skill_tags.filter(skill__in=existing - skills).delete()
+    ResumeSkillTag.objects.bulk_create([ResumeSkillTag(resume=resume, skill=skill) for skill in skills - existing])
+    return sorted(skills)
+
+
+def rebuild_resume_skill_tags_by_id(resume_id):
+    resume = ResumePersonalInfo.objects.filter(pk=resume_id).first()
+    if resume is not None:
+        rebuild_resume_skill_tags(resume)
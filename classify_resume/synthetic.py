@@ -0,0 +1,60 @@
+import random
+
+from itertools import accumulate
+
+SKILL_WORDS = '''
+python django flask postgresql mysql redis celery docker kubernetes aws azure linux git rest graphql api javascript
+typescript react angular vue html css sass webpack node java spring kotlin swift android ios golang rust scala spark
+hadoop kafka airflow pandas numpy tensorflow pytorch sql nosql mongodb elasticsearch terraform ansible jenkins agile
+scrum testing microservices security networking figma photoshop excel salesforce sap accounting marketing sales
+'''.split()
+FILLER_WORDS = '''
+the and of to in for with on as by team project experience years develop developed developing design designed build
+built maintain maintained manage managed lead led work worked working support supported client clients customer
+customers product products service services system systems application applications data platform platforms quality
+performance delivery solution solutions business process processes requirement requirements responsible senior
+junior engineer engineers developer developers analyst manager company companies strong knowledge skills ability
+communication collaborate collaborated implement implemented improve improved new using across multiple including
+'''.split()
+SYLLABLES = 'ba be bi bo bu da de di do du ka ke ki ko ku la le li lo lu ma me mi mo mu na ne ni no nu ra re ri ro ru ' \
+            'sa se si so su ta te ti to tu va ve vi vo vu za ze zi zo zu'.split()
+
+
+class SyntheticCorpus:
+    # deterministic job descriptions and resumes: skill and filler words plus a long zipf tail of made-up words,
+    # wrapped in the markup CKEditor produces
+    def __init__(self, seed=0, vocabulary_size=5000):
+        self.random = random.Random(seed)
+        tail = set()
+        while len(tail) < vocabulary_size:
+            tail.add(''.join(self.random.choices(SYLLABLES, k=self.random.randint(2, 4))))
+        self.vocabulary = FILLER_WORDS + SKILL_WORDS + sorted(tail)
+        self.cumulative_weights = list(accumulate(1 / rank for rank in range(1, len(self.vocabulary) + 1)))
+
+    def words(self, count):
+        return self.random.choices(self.vocabulary, cum_weights=self.cumulative_weights, k=count)
+
+    def sentence(self, length):
+        words = self.words(length)
+        if self.random.random() < 0.3:
+            words[self.random.randrange(len(words))] = f'<strong>{self.random.choice(SKILL_WORDS)}</strong>'
+        if self.random.random() < 0.1:
+            words.append('&amp;&nbsp;' + self.random.choice(SKILL_WORDS))
+        return ' '.join(words).capitalize() + '.'
+
+    def html(self, paragraphs, words_per_paragraph):
+        blocks = []
+        for _ in range(paragraphs):
+            if self.random.random() < 0.3:
+                items = ''.join(f'<li>{self.sentence(6)}</li>' for _ in range(self.random.randint(2, 5)))
+                blocks.append(f'<ul>{items}</ul>')
+            else:
+                sentences = ' '.join(self.sentence(12) for _ in range(max(words_per_paragraph // 12, 1)))
+                blocks.append(f'<p>{sentences}</p>')
+        return '\n'.join(blocks)
+
+    def job_description(self):
+        return self.html(self.random.randint(3, 6), 60)
+
+    def resume_experience(self):
+        return self.html(self.random.randint(2, 5), 48)
@@ -0,0 +1,243 @@
+import heapq
+import json
+import mmap
+import os
+import struct
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from classify_resume.models import ResumeTermVector
+from classify_resume.pipeline import pipeline_stamp
+
+# one posting = (resume id, normalized term weight); postings of a term are stored contiguously, sorted by resume id
+POSTING = struct.Struct('<qd')
+LEXICON_FILE = 'lexicon.json'
+POSTINGS_FILE = 'postings-{}.bin'
+
+_loaded_index = None
+
+
+def index_dir():
+    return settings.TALENT_INDEX_DIR
+
+
+def read_lexicon(directory):
+    with open(os.path.join(directory, LEXICON_FILE)) as lexicon_file:
+        lexicon = json.load(lexicon_file)
+    # indexes built before the postings file was versioned name it postings.bin
+    lexicon.setdefault('postings', 'postings.bin')
+    lexicon.setdefault('pipeline', None)
+    return lexicon
+
+
+def read_postings(directory):
+    lexicon = read_lexicon(directory)
+    postings = {}
+    with open(os.path.join(directory, lexicon['postings']), 'rb') as postings_file:
+        buffer = postings_file.read()
+    for term, (offset, count, _) in lexicon['terms'].items():
+        postings[term] = dict(POSTING.iter_unpack(buffer[offset * POSTING.size:(offset + count) * POSTING.size]))
+    return parse_datetime(lexicon['built_at']), postings
+
+
+def write_postings(directory, built_at, postings):
+    os.makedirs(directory, exist_ok=True)
+    lexicon_path = os.path.join(directory, LEXICON_FILE)
+    previous = read_lexicon(directory)['postings'] if os.path.exists(lexicon_path) else None
+    # every build writes a new postings file named in its lexicon, so the lexicon swap switches both at once
+    # and a reader can never pair one build's offsets with another build's postings
+    postings_name = POSTINGS_FILE.format(built_at.strftime('%Y%m%d%H%M%S%f'))
+    terms = {}
+    offset = 0
+    with open(os.path.join(directory, postings_name), 'wb') as postings_file:
+        for term in sorted(postings):
+            weights = postings[term]
+            if not weights:
+                continue
+            for resume_id in sorted(weights):
+                postings_file.write(POSTING.pack(resume_id, weights[resume_id]))
+            terms[term] = [offset, len(weights), max(weights.values())]
+            offset += len(weights)
+    with open(lexicon_path + '.tmp', 'w') as lexicon_file:
+        json.dump({
+            'built_at': built_at.isoformat(), 'pipeline': pipeline_stamp(), 'postings': postings_name, 'terms': terms
+        }, lexicon_file)
+    os.replace(lexicon_path + '.tmp', lexicon_path)
+    # the previous postings file stays for readers that loaded the old lexicon a moment ago
+    for name in os.listdir(directory):
+        if name.startswith('postings') and name.endswith('.bin') and name not in (postings_name, previous):
+            os.remove(os.path.join(directory, name))
+    return len(terms), offset
+
+
+def add_vector(postings, vector):
+    if vector.norm == 0:
+        return
+    for term, count in vector.terms.items():
+        postings.setdefault(term, {})[vector.resume_id] = count / vector.norm
+
+
+def build_index(directory=None, full=False):
+    directory = directory or index_dir()
+    started_at = timezone.now()
+    # vectors of another TOKEN_PIPELINE are left out until rebuild_term_vectors has rebuilt them
+    vectors = ResumeTermVector.objects.filter(pipeline=pipeline_stamp())
+
+    lexicon_path = os.path.join(directory, LEXICON_FILE)
+    if full or not os.path.exists(lexicon_path) or read_lexicon(directory)['pipeline'] != pipeline_stamp():
+        postings = {}
+        changed = vectors
+    else:
+        built_at, postings = read_postings(directory)
+        changed = vectors.filter(updated_at__gte=built_at)
+        stale_ids = set(changed.values_list('resume_id', flat=True))
+        indexed_ids = {resume_id for weights in postings.values() for resume_id in weights}
+        stale_ids |= indexed_ids - set(vectors.values_list('resume_id', flat=True))
+        for weights in postings.values():
+            for resume_id in stale_ids & weights.keys():
+                del weights[resume_id]
+
+    total_changed = 0
+    for vector in changed.iterator(chunk_size=500):
+        add_vector(postings, vector)
+        total_changed += 1
+    total_terms, total_postings = write_postings(directory, started_at, postings)
+    return {'changed': total_changed, 'terms': total_terms, 'postings': total_postings}
+
+
+class PostingCursor:
+    def __init__(self, buffer, offset, count, upper_bound, query_weight):
+        self.buffer = buffer
+        self.start = offset
+        self.end = offset + count
+        self.position = offset
+        self.upper_bound = upper_bound
+        self.query_weight = query_weight
+        self.touched = 0
+        self.current = None
+        self._read()
+
+    def _read(self):
+        if self.position < self.end:
+            self.current = POSTING.unpack_from(self.buffer, self.position * POSTING.size)
+            self.touched += 1
+        else:
+            self.current = None
+
+    def resume_id(self):
+        return self.current[0] if self.current else None
+
+    def score(self):
+        return self.current[1] * self.query_weight
+
+    def next(self):
+        self.position += 1
+        self._read()
+
+    def seek(self, target):
+        # galloping search for the first posting with resume id >= target, only decoding the probed records
+        if self.current is None or self.current[0] >= target:
+            return
+        step = 1
+        low = self.position
+        high = self.position + step
+        while high < self.end and POSTING.unpack_from(self.buffer, high * POSTING.size)[0] < target:
+            self.touched += 1
+            low = high
+            step *= 2
+            high = self.position + step
+        high = min(high, self.end)
+        while low < high:
+            middle = (low + high) // 2
+            self.touched += 1
+            if POSTING.unpack_from(self.buffer, middle * POSTING.size)[0] < target:
+                low = middle + 1
+            else:
+                high = middle
+        self.position = low
+        self._read()
+
+
+class TalentIndex:
+    def __init__(self, directory):
+        lexicon = read_lexicon(directory)
+        self.built_at = parse_datetime(lexicon['built_at'])
+        self.pipeline = lexicon['pipeline']
+        self.terms = lexicon['terms']
+        self.total_postings = sum(count for _, count, _ in self.terms.values())
+        with open(os.path.join(directory, lexicon['postings']), 'rb') as postings_file:
+            self.buffer = mmap.mmap(postings_file.fileno(), 0, access=mmap.ACCESS_READ) \
+                if os.fstat(postings_file.fileno()).st_size else b''
+
+    def top_k(self, query_terms, query_norm, k=20):
+        # MaxScore: lists are ordered by their score upper bound, the cheapest lists whose bounds together cannot
+        # lift a document above the current k-th score are only probed for candidates found in the other lists
+        stats = {'postings': self.total_postings, 'touched': 0}
+        if query_norm == 0 or k <= 0:
+            return [], stats
+
+        cursors = []
+        for term, count in query_terms.items():
+            if term in self.terms:
+                offset, total, max_weight = self.terms[term]
+                query_weight = count / query_norm
+                cursors.append(PostingCursor(self.buffer, offset, total, max_weight * query_weight, query_weight))
+        cursors.sort(key=lambda cursor: cursor.upper_bound)
+
+        bounds = []
+        running = 0
+        for cursor in cursors:
+            running += cursor.upper_bound
+            bounds.append(running)
+
+        heap = []
+        threshold = 0
+        first_essential = 0
+        while first_essential < len(cursors):
+            essential = cursors[first_essential:]
+            candidate = min((cursor.resume_id() for cursor in essential if cursor.current), default=None)
+            if candidate is None:
+                break
+
+            score = 0
+            for cursor in essential:
+                if cursor.resume_id() == candidate:
+                    score += cursor.score()
+                    cursor.next()
+            for position in range(first_essential - 1, -1, -1):
+                if score + bounds[position] <= threshold:
+                    break
+                cursor = cursors[position]
+                cursor.seek(candidate)
+                if cursor.resume_id() == candidate:
+                    score += cursor.score()
+
+            if len(heap) < k:
+                heapq.heappush(heap, (score, -candidate))
+            elif score > threshold:
+                heapq.heappushpop(heap, (score, -candidate))
+            else:
+                continue
+            if len(heap) == k:
+                threshold = heap[0][0]
+                while first_essential < len(cursors) and bounds[first_essential] <= threshold:
+                    first_essential += 1
+
+        stats['touched'] = sum(cursor.touched for cursor in cursors)
+        return [(-resume_id, score) for score, resume_id in sorted(heap, reverse=True)], stats
+
+
+def get_talent_index():
+    global _loaded_index
+    lexicon_path = os.path.join(index_dir(), LEXICON_FILE)
+    if not os.path.exists(lexicon_path):
+        return None
+    modified = os.path.getmtime(lexicon_path)
+    if _loaded_index is None or _loaded_index[0] != modified:
+        _loaded_index = (modified, TalentIndex(index_dir()))
+    # an index of another TOKEN_PIPELINE has terms the job vectors no longer contain
+    if _loaded_index[1].pipeline != pipeline_stamp():
+        return None
+    return _loaded_index[1]
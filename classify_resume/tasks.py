@@ -0,0 +1,106 @@
+import hashlib
+import json
+import traceback
+
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.core import mail
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from classify_resume.models import AppliedJob, Jobs, Task
+from classify_resume.scoring import rebuild_resume_section_vector_by_id, rebuild_resume_term_vector_by_id, \
+    rescore_job_applications, score_applications
+
+# ready rows one claim tries before giving up, other workers may win the race for each of them
+CLAIM_CANDIDATES = 10
+
+
+def rescore_job(job_id):
+    job = Jobs.objects.filter(pk=job_id).first()
+    if job is not None:
+        rescore_job_applications(job)
+
+
+def score_application(application_id):
+    application = AppliedJob.objects.filter(pk=application_id).select_related('apply_job').first()
+    if application is not None:
+        score_applications(application.apply_job, [application])
+        application.save(update_fields=['similarity_score'])
+
+
+def send_mail(subject, message, recipients):
+    mail.send_mail(subject, message, settings.EMAIL_HOST_USER, recipients, fail_silently=False)
+
+
+TASK_HANDLERS = {
+    'rebuild_resume_term_vector': rebuild_resume_term_vector_by_id,
+    'rebuild_resume_section_vector': rebuild_resume_section_vector_by_id,
+    'rescore_job': rescore_job,
+    'score_application': score_application,
+    'send_mail': send_mail,
+}
+
+
+def task_key(name, payload):
+    return hashlib.sha1(json.dumps([name, payload], sort_keys=True).encode()).hexdigest()
+
+
+def create_task(name, payload):
+    key = task_key(name, payload)
+    if not Task.objects.filter(key=key, status='queued').exists():
+        Task.objects.create(
+            name=name, payload=payload, key=key, run_after=timezone.now(), max_attempts=settings.TASK_MAX_ATTEMPTS
+        )
+
+
+def enqueue(name, **payload):
+    # deferred to the commit, so the worker never reads the rows of the request before they are visible
+    handler = TASK_HANDLERS[name]
+    if settings.TASK_QUEUE_EAGER:
+        transaction.on_commit(partial(handler, **payload))
+    else:
+        transaction.on_commit(partial(create_task, name, payload))
+
+
+def claim_task(worker):
+    now = timezone.now()
+    # tasks whose lease expired on their last allowed attempt are given up instead of being claimed again
+    Task.objects.filter(status='running', locked_until__lt=now, attempts__gte=F('max_attempts')).update(
+        status='failed', locked_by='', locked_until=None, last_error='visibility timeout expired'
+    )
+    ready = Q(status='queued', run_after__lte=now) | Q(status='running', locked_until__lt=now)
+    for task_id in Task.objects.filter(ready).order_by('run_after', 'id').values_list('id', flat=True)[:CLAIM_CANDIDATES]:
+        # the conditional update is the lock: only one worker sees its row still ready
+        claimed = Task.objects.filter(ready, pk=task_id).update(
+            status='running',
+            locked_by=worker,
+            locked_until=now + timedelta(seconds=settings.TASK_VISIBILITY_TIMEOUT),
+            attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return Task.objects.get(pk=task_id)
+    return None
+
+
+def run_task(task, worker):
+    owned = Task.objects.filter(pk=task.pk, status='running', locked_by=worker)
+    try:
+        TASK_HANDLERS[task.name](**task.payload)
+    except Exception:
+        if task.attempts >= task.max_attempts:
+            owned.update(status='failed', locked_by='', locked_until=None, last_error=traceback.format_exc())
+        else:
+            owned.update(
+                status='queued',
+                locked_by='',
+                locked_until=None,
+                last_error=traceback.format_exc(),
+                run_after=timezone.now() + timedelta(seconds=settings.TASK_RETRY_DELAY * 2 ** (task.attempts - 1)),
+            )
+        return False
+    owned.delete()
+    return True
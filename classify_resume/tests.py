@@ -1,3 +1,959 @@
-from django.test import TestCase
+import json
+import math
+import os
+import random
+import shutil
+import tempfile
+from collections import Counter
+from io import StringIO
+from types import SimpleNamespace
 
-# Create your tests here.
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import QuerySet
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from classify_resume.ann_index import build_index as build_ann_index, build_tree, descend, get_ann_index
+from classify_resume.management.commands.audit_query_plans import full_scans
+from classify_resume.management.commands.rescore import score_chunk
+from classify_resume.duplicates import minhash, near_duplicate_clusters
+from classify_resume.forms import JobEditForm
+from classify_resume.middleware import get_resume
+from classify_resume.models import AppliedJob, CorpusStatistics, Jobs, ProfessionalExperienceInfo, \
+    ResumeEducationInfo, ResumePersonalInfo, ResumeSectionVector, ResumeSignature, ResumeTermVector, SkillInfo, \
+    Task, TermDocumentFrequency, User
+from classify_resume.pagination import keyset_page
+from classify_resume.pipeline import analyze, pipeline_stamp
+from classify_resume.progress import resume_progress
+from classify_resume.recommendations import RankedJobFeed, recommended_job_ids, recommended_jobs
+from classify_resume.salaries import salary_histogram
+from classify_resume.search import match_expression, search_jobs
+from classify_resume.skills import extract_skills
+from classify_resume.scoring import calculate_cosine_similarity, cosine_from_vectors, batch_bm25_scores, \
+    batch_cosine_scores, batch_tfidf_scores, preprocess_text, recount_corpus_statistics, rescore_user_applications, \
+    score_applications, score_term_vectors, vector_norm, ckeditor_clean, hashed_vector, job_term_vector, text_to_terms
+from classify_resume.synthetic import SyntheticCorpus
+from classify_resume.talent_index import TalentIndex, build_index, get_talent_index, read_postings
+from classify_resume.tasks import claim_task, create_task, run_task
+from classify_resume.tokenizer import html_tokens
+
+
+class BatchCosineScoresTest(SimpleTestCase):
+    job_text = 'Senior Python developer: Django, PostgreSQL and REST APIs. Python testing is a plus.'
+    resume_texts = [
+        'Built REST APIs in Python and Django for five years',
+        'Java developer, Spring and Oracle',
+        'python python python django postgresql',
+        '',
+        '!!! ???',
+    ]
+
+    def terms(self, text):
+        return Counter(preprocess_text(text).split())
+
+    def test_matches_reference_scorer(self):
+        job_terms = self.terms(self.job_text)
+        vectors = [(self.terms(text), vector_norm(self.terms(text))) for text in self.resume_texts]
+
+        scores = batch_cosine_scores(job_terms, vector_norm(job_terms), vectors)
+
+        for text, score in zip(self.resume_texts, scores):
+            self.assertAlmostEqual(score, calculate_cosine_similarity(self.job_text, text))
+
+    def test_empty_job_scores_zero(self):
+        vectors = [(self.terms(text), vector_norm(self.terms(text))) for text in self.resume_texts]
+        self.assertEqual(list(batch_cosine_scores(Counter(), 0, vectors)), [0] * len(self.resume_texts))
+
+    def test_hashed_vectors_approximate_reference_scorer(self):
+        job_vector = hashed_vector(self.terms(self.job_text), 4096)
+        for text in self.resume_texts:
+            self.assertAlmostEqual(
+                float(hashed_vector(self.terms(text), 4096) @ job_vector),
+                calculate_cosine_similarity(self.job_text, text),
+                places=5
+            )
+
+
+class HtmlTokensTest(SimpleTestCase):
+    documents = [
+        '<h2>Backend Engineer</h2><p>We need a <strong>Python</strong>/<em>Django</em> developer for R&amp;D.</p>',
+        '<ol start="3"><li>REST&nbsp;APIs</li><li>SQL &amp; ORM<ul><li>PostgreSQL</li></ul></li></ol>',
+        '<p>foo<b>bar</b><i>baz</i> qux <b> padded </b>tail&rsquo;s caf&eacute; &#8211; na\u00efve</p>',
+        '<p>Apply at <a href="https://example.com/jobs" title="Careers">our site</a> or '
+        '<a href="https://example.com">https://example.com</a>, <a href="#top">top</a></p>',
+        '<table><tr><th>Stack</th><td>k8s</td></tr></table><blockquote>quoted</blockquote><hr><pre>a  b</pre>',
+        '<p><img src="/media/logo.png" alt="Company logo">full-time<br>remote</p><style>p {color: red}</style>',
+        'plain text, no tags at all',
+        '',
+    ]
+
+    def test_matches_html2text_tokens(self):
+        for html in self.documents:
+            with self.subTest(html=html):
+                self.assertEqual(Counter(html_tokens(html)), Counter(preprocess_text(ckeditor_clean(html)).split()))
+
+
+class TokenPipelineTest(SimpleTestCase):
+    tokens = ['the', 'engineers', 'are', 'building', 'rest', 'apis', 'with', 'django']
+
+    def test_stop_words_and_stemming(self):
+        self.assertEqual(analyze(self.tokens, ['stopwords', 'stem']), ['engineer', 'build', 'rest', 'api', 'django'])
+
+    def test_bigrams_follow_filtered_tokens(self):
+        self.assertEqual(analyze(['machine', 'learning'], ['bigrams']), ['machine', 'learning', 'machine_learning'])
+
+    def test_unknown_stage(self):
+        with self.assertRaises(ImproperlyConfigured):
+            analyze(self.tokens, ['lemmatize'])
+
+
+class NearDuplicateClustersTest(SimpleTestCase):
+    def signature(self, words):
+        return minhash({' '.join(words[start:start + 3]) for start in range(len(words) - 2)})
+
+    def test_clusters_near_duplicates_only(self):
+        words = [f'word{number}' for number in range(200)]
+        edited = list(words)
+        edited[100] = 'changed'
+        signatures = {
+            'original': self.signature(words),
+            'edited': self.signature(edited),
+            'other': self.signature([f'other{number}' for number in range(200)]),
+            'empty': [],
+        }
+
+        clusters = near_duplicate_clusters(signatures)
+
+        self.assertEqual([sorted(members) for members in clusters], [['edited', 'original']])
+
+    def test_bands_must_fit_the_permutations(self):
+        for bands in (0, 200):
+            with self.subTest(bands=bands), override_settings(MINHASH_PERMUTATIONS=128, MINHASH_BANDS=bands):
+                with self.assertRaises(ImproperlyConfigured):
+                    near_duplicate_clusters({'resume': self.signature(['python', 'django', 'developer'])})
+
+
+class RandomProjectionTreeTest(SimpleTestCase):
+    def test_points_descend_to_their_leaf(self):
+        generator = np.random.RandomState(0)
+        points = np.vstack([generator.standard_normal((40, 8)), np.ones((30, 8))]).astype(np.float32)
+        tree = build_tree(points, 8, generator)
+
+        # the 30 identical points cannot be split and share one leaf
+        self.assertEqual(len(set(tree['leaf_of'][40:])), 1)
+        self.assertLessEqual(np.bincount(tree['leaf_of'][:40]).max(), 8)
+        self.assertEqual([descend(tree, point) for point in points], tree['leaf_of'].tolist())
+
+
+@override_settings(TASK_MAX_ATTEMPTS=2, TASK_RETRY_DELAY=0)
+class TaskQueueTest(TestCase):
+    def test_expired_lease_is_claimed_by_another_worker(self):
+        create_task('rescore_job', {'job_id': 1})
+        create_task('rescore_job', {'job_id': 1})
+        task = claim_task('first')
+        self.assertEqual(Task.objects.count(), 1)
+        self.assertIsNone(claim_task('second'))
+
+        Task.objects.update(locked_until=timezone.now())
+        self.assertEqual(claim_task('second').attempts, 2)
+        # the first worker lost its lease, its result no longer touches the task
+        self.assertTrue(run_task(task, 'first'))
+        self.assertEqual(Task.objects.get().locked_by, 'second')
+
+    def test_failing_task_is_retried_then_failed(self):
+        create_task('rescore_job', {'unknown': 1})
+        self.assertFalse(run_task(claim_task('worker'), 'worker'))
+        self.assertFalse(run_task(claim_task('worker'), 'worker'))
+        self.assertIsNone(claim_task('worker'))
+        self.assertEqual(Task.objects.get().status, 'failed')
+
+
+class SyntheticCorpusTest(SimpleTestCase):
+    def test_same_seed_same_corpus(self):
+        first, second = SyntheticCorpus(seed=7), SyntheticCorpus(seed=7)
+        self.assertEqual(first.job_description(), second.job_description())
+        self.assertEqual(first.resume_experience(), second.resume_experience())
+        self.assertNotEqual(first.job_description(), SyntheticCorpus(seed=8).job_description())
+
+
+class AdminJobDetailsQueriesTest(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user('admin', 'admin@example.com', 'password')
+        self.job = Jobs.objects.create(user=self.admin, job_title='Developer')
+        self.client.force_login(self.admin)
+
+    def add_applicants(self, count):
+        for _ in range(count):
+            number = User.objects.count()
+            user = User.objects.create_user(f'user{number}', f'user{number}@example.com', 'password')
+            ResumePersonalInfo.objects.create(user=user, user_full_name=f'Applicant {number}')
+            AppliedJob.objects.create(user=user, apply_job=self.job, apply_status='Pending')
+
+    def test_query_count_does_not_grow_with_applicants(self):
+        self.add_applicants(2)
+        self.client.get(f'/admin-job-detail/{self.job.id}/')
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(f'/admin-job-detail/{self.job.id}/')
+        expected = len(queries)
+
+        self.add_applicants(8)
+        # warms the salary histogram of the new applications version, as the first request did for the old one
+        self.client.get(f'/admin-job-detail/{self.job.id}/')
+        with self.assertNumQueries(expected):
+            response = self.client.get(f'/admin-job-detail/{self.job.id}/')
+        self.assertContains(response, 'Applicant 10')
+
+    @override_settings(APPLICANTS_PER_PAGE=2)
+    def test_collapsed_pages_skip_the_hidden_duplicates(self):
+        about = ' '.join(f'word{number}' for number in range(100))
+        for number, (text, score) in enumerate([(about, 0.9), (about, 0.8), ('other resume text here', 0.7),
+                                                (about + ' extra', 0.6), ('a third distinct resume', 0.5)]):
+            user = User.objects.create_user(f'dup{number}', f'dup{number}@example.com', 'password')
+            ResumePersonalInfo.objects.create(user=user, user_full_name=f'Duplicate {number}', about_description=text)
+            AppliedJob.objects.create(user=user, apply_job=self.job, similarity_score=score)
+
+        response = self.client.get(f'/admin-job-detail/{self.job.id}/?collapse=1')
+        first = response.context['applicants']
+        self.assertEqual([applicant.user.username for applicant in first], ['dup0', 'dup2'])
+        self.assertEqual(first.object_list[0].duplicates, 2)
+        response = self.client.get(f'/admin-job-detail/{self.job.id}/?collapse=1&after={first.next_cursor}')
+        self.assertEqual([applicant.user.username for applicant in response.context['applicants']], ['dup4'])
+        self.assertFalse(response.context['applicants'].has_next)
+
+    def test_only_a_scored_applicant_is_short_listed(self):
+        self.add_applicants(3)
+        self.client.get(f'/admin-job-detail/{self.job.id}/')
+        self.assertFalse(AppliedJob.objects.filter(apply_status='Short Listed').exists())
+
+        best = AppliedJob.objects.order_by('id').last()
+        AppliedJob.objects.filter(pk=best.pk).update(similarity_score=0.4)
+        self.client.get(f'/admin-job-detail/{self.job.id}/')
+        self.assertEqual(list(AppliedJob.objects.filter(apply_status='Short Listed')), [best])
+
+
+@override_settings(TASK_QUEUE_EAGER=True)
+class RescoreUserApplicationsTest(TestCase):
+    descriptions = ['<p>Python and Django developer</p>', '<p>Java and Spring services</p>',
+                    '<p>SQL reporting with Python</p>', '<p>Rust systems</p>', '<p>Django REST APIs and SQL</p>']
+
+    def setUp(self):
+        self.admin = User.objects.create_user('admin', 'admin@example.com', 'password')
+        self.user = User.objects.create_user('applicant', 'applicant@example.com', 'password')
+        self.resume = ResumePersonalInfo.objects.create(user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            ProfessionalExperienceInfo.objects.create(
+                user_info=self.resume, official_description='<p>Python services, Django APIs and SQL</p>'
+            )
+            SkillInfo.objects.create(user_info=self.resume, skill_type='Python')
+
+    def apply(self, count):
+        for description in self.descriptions[:count]:
+            job = Jobs.objects.create(user=self.admin, job_title='Developer', job_description=description)
+            AppliedJob.objects.create(user=self.user, apply_job=job)
+
+    def test_matches_scoring_each_application_and_queries_do_not_grow(self):
+        for scorer in ['cosine', 'hashed', 'tfidf', 'bm25', 'multifield']:
+            with self.subTest(scorer=scorer), override_settings(RESUME_SCORER=scorer):
+                AppliedJob.objects.all().delete()
+                self.apply(2)
+                with CaptureQueriesContext(connection) as queries:
+                    rescore_user_applications(self.user.id)
+                two_jobs = len(queries)
+                AppliedJob.objects.all().delete()
+                self.apply(5)
+                with CaptureQueriesContext(connection) as queries:
+                    rescore_user_applications(self.user.id)
+                self.assertEqual(len(queries), two_jobs)
+
+                for application in AppliedJob.objects.select_related('apply_job'):
+                    expected, = score_applications(application.apply_job, [application])
+                    self.assertAlmostEqual(application.similarity_score, expected.similarity_score, places=5)
+                self.assertGreater(AppliedJob.objects.filter(similarity_score__gt=0).count(), 0)
+
+
+class SalaryHistogramTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        admin = User.objects.create_user('admin', 'admin@example.com', 'password')
+        self.job = Jobs.objects.create(user=admin, job_title='Developer', salary_buckets=[1000, 5000])
+        for number, salary in enumerate([500, 1000, 1001, 9000]):
+            user = User.objects.create_user(f'user{number}', f'user{number}@example.com', 'password')
+            AppliedJob.objects.create(user=user, apply_job=self.job, expected_salary=salary)
+
+    def test_counts_per_bucket_in_one_cached_query(self):
+        self.job.refresh_from_db()
+        with self.assertNumQueries(1):
+            self.assertEqual(salary_histogram(self.job), [('0-1000', 2), ('1001-5000', 1), ('5001-999999999', 1)])
+        with self.assertNumQueries(0):
+            salary_histogram(self.job)
+
+    def test_soft_delete_invalidates(self):
+        self.job.refresh_from_db()
+        salary_histogram(self.job)
+        application = AppliedJob.objects.get(expected_salary=9000)
+        application.is_deleted = True
+        application.save()
+        application.similarity_score = 1
+        application.save(update_fields=['similarity_score'])
+
+        self.job.refresh_from_db()
+        self.assertEqual(salary_histogram(self.job)[-1], ('5001-999999999', 0))
+
+    def test_bucket_bounds_are_validated(self):
+        def buckets(value):
+            form = JobEditForm({'job_title': 'Senior Developer', 'salary_buckets': value}, instance=self.job)
+            return form.cleaned_data['salary_buckets'] if form.is_valid() else form.errors['salary_buckets']
+
+        self.assertEqual(buckets('5000, 1000, 0, 1000'), [1000, 5000])
+        self.assertEqual(buckets('1000, 2\u00b2'), ['Salary buckets must be whole numbers separated by commas'])
+        self.assertEqual(buckets('1000, -5'), ['Salary buckets must be whole numbers separated by commas'])
+
+
+class QueryPlanAuditTest(SimpleTestCase):
+    def test_only_unindexed_scans_are_flagged(self):
+        plan = [
+            'SCAN classify_resume_emailcontent',
+            'SCAN classify_resume_jobs USING INDEX jobs_active_idx',
+            'SEARCH classify_resume_appliedjob USING INDEX appliedjob_user_job_idx (user_id=? AND apply_job_id=?)',
+        ]
+        self.assertEqual(full_scans(plan), ['SCAN classify_resume_emailcontent'])
+
+
+class KeysetPaginationTest(TestCase):
+    def setUp(self):
+        admin = User.objects.create_user('admin', 'admin@example.com', 'password')
+        job = Jobs.objects.create(user=admin, job_title='Developer')
+        for number, score in enumerate([0.9, 0.5, 0.5, 0.5, 0.1]):
+            user = User.objects.create_user(f'user{number}', f'user{number}@example.com', 'password')
+            AppliedJob.objects.create(user=user, apply_job=job, similarity_score=score)
+        self.applications = AppliedJob.objects.filter(apply_job=job)
+        self.ordering = ['-similarity_score', 'id']
+
+    def page(self, **cursor):
+        request = RequestFactory().get('/', {'skill': 'python', **cursor})
+        return keyset_page(request, self.applications, self.ordering, 2)
+
+    def test_pages_forward_and_back_through_ties(self):
+        expected = list(self.applications.order_by(*self.ordering))
+        pages = [self.page()]
+        while pages[-1].has_next:
+            pages.append(self.page(after=pages[-1].next_cursor))
+        self.assertEqual([row for page in pages for row in page], expected)
+        self.assertEqual([(page.start_index, page.end_index) for page in pages], [(1, 2), (3, 4), (5, 5)])
+        self.assertEqual(pages[-1].query, '&skill=python')
+
+        back = self.page(before=pages[-1].previous_cursor)
+        self.assertEqual(list(back), expected[2:4])
+        self.assertEqual((back.start_index, back.has_previous, back.has_next), (3, True, True))
+        first = self.page(before=back.previous_cursor)
+        self.assertEqual((list(first), first.has_previous), (expected[:2], False))
+
+    def test_malformed_cursor_starts_over(self):
+        self.assertEqual(self.page(after='not a cursor').start_index, 1)
+
+
+class JobSearchTest(TestCase):
+    def setUp(self):
+        admin = User.objects.create_user('admin', 'admin@example.com', 'password')
+        self.backend = Jobs.objects.create(
+            user=admin, job_title='Python Developer', job_description='<p>Build Django services &amp; APIs</p>'
+        )
+        self.frontend = Jobs.objects.create(
+            user=admin, job_title='Frontend Engineer', job_description='<p>React work, some Python scripting</p>'
+        )
+
+    def test_prefix_matches_ranked_with_the_title_first(self):
+        results = search_jobs('pyth')
+        self.assertEqual(results, [self.backend, self.frontend])
+        self.assertEqual(results[0].highlighted_title, '<mark>Python</mark> Developer')
+        self.assertIn('&amp; APIs', search_jobs('django')[0].snippet)
+
+    def test_triggers_follow_every_write(self):
+        self.frontend.is_active = False
+        self.frontend.save()
+        self.assertEqual(search_jobs('python'), [self.backend])
+        Jobs.objects.filter(pk=self.backend.pk).update(job_title='Golang Developer')
+        self.assertEqual(search_jobs('python'), [])
+        self.backend.delete()
+        self.assertEqual(search_jobs('golang'), [])
+
+    def test_partial_save_of_the_description_writes_the_derived_columns(self):
+        self.backend.job_description = '<p>Kubernetes and Rust tooling</p>'
+        self.backend.save(update_fields=['job_description'])
+        job = Jobs.objects.get(pk=self.backend.pk)
+        self.assertEqual((job.job_description_text.strip(), job.required_skills),
+                         ('Kubernetes and Rust tooling', ['Kubernetes', 'Rust']))
+        self.assertEqual(search_jobs('kubernetes'), [self.backend])
+
+        resume = ResumePersonalInfo.objects.create(user=self.backend.user)
+        experience = ProfessionalExperienceInfo.objects.create(user_info=resume, official_description='<p>Java</p>')
+        experience.official_description = '<p>Go services</p>'
+        experience.save(update_fields=['official_description'])
+        experience.refresh_from_db()
+        self.assertEqual(experience.official_description_text.strip(), 'Go services')
+
+    def test_pages_and_endpoint(self):
+        self.assertContains(self.client.get('/jobs/?q=pyth'), '<mark>Python</mark> Developer')
+        results = self.client.get('/job-search/?q=react').json()['results']
+        self.assertEqual([result['id'] for result in results], [self.frontend.id])
+
+    def test_older_better_matches_are_kept_and_truncation_is_reported(self):
+        results = search_jobs('python')
+        self.assertEqual((results[0], results.matches, results.truncated), (self.backend, 2, False))
+
+        with override_settings(JOB_SEARCH_CANDIDATES=1):
+            results = search_jobs('python')
+            self.assertEqual((list(results), results.truncated), ([self.frontend], True))
+            self.assertContains(self.client.get('/jobs/?q=python'), '2 jobs match')
+            response = self.client.get('/job-search/?q=python').json()
+            self.assertEqual((response['matches'], response['truncated']), (2, True))
+
+    def test_query_syntax_is_not_interpreted(self):
+        self.assertEqual(match_expression('C++ OR "NEAR(x'), '"c" "near" "x"*')
+        self.assertEqual(search_jobs('***'), [])
+
+
+class ResumeProgressTest(TestCase):
+    def test_all_wizard_flags_in_one_query(self):
+        user = User.objects.create_user('applicant', 'applicant@example.com', 'password')
+        with self.assertNumQueries(1):
+            self.assertEqual(resume_progress(user), (None, {
+                'is_exist_personal': False, 'is_exist_educational': False, 'is_exist_professional': False,
+                'is_exist_skills': False, 'is_exist_certi': False,
+            }))
+
+        resume = ResumePersonalInfo.objects.create(user=user)
+        ResumePersonalInfo.objects.create(user=user)
+        SkillInfo.objects.create(user_info=resume, skill_type='Python')
+        with self.assertNumQueries(1):
+            first, progress = resume_progress(user)
+        self.assertEqual(first, resume)
+        self.assertEqual([flag for flag, done in progress.items() if done], ['is_exist_personal', 'is_exist_skills'])
+
+
+class CurrentResumeTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('applicant', 'applicant@example.com', 'password')
+        self.resume = ResumePersonalInfo.objects.create(user=self.user, user_full_name='First Name')
+
+    def request(self):
+        request = RequestFactory().get('/')
+        request.user = self.user
+        return request
+
+    def test_one_query_per_request_then_cached(self):
+        request = self.request()
+        with self.assertNumQueries(1):
+            self.assertEqual(get_resume(request), self.resume)
+            get_resume(request)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_resume(self.request()).user_full_name, 'First Name')
+
+    @override_settings(CURRENT_RESUME_CACHE_TIMEOUT=0)
+    def test_without_cache_every_request_queries(self):
+        get_resume(self.request())
+        with self.assertNumQueries(1):
+            get_resume(self.request())
+
+    def test_saving_the_resume_invalidates(self):
+        get_resume(self.request())
+        with self.captureOnCommitCallbacks(execute=True):
+            self.resume.user_full_name = 'New Name'
+            self.resume.save()
+        self.assertEqual(get_resume(self.request()).user_full_name, 'New Name')
+
+    def test_header_comes_from_the_context_processor(self):
+        self.client.force_login(self.user)
+        self.assertContains(self.client.get('/user-panel/'), 'First Name')
+
+
+class BulkSectionInsertTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('applicant', 'applicant@example.com', 'password')
+        self.resume = ResumePersonalInfo.objects.create(user=self.user)
+        self.client.force_login(self.user)
+
+    def post_skills(self, *skills):
+        data = {}
+        for number, (title, value) in enumerate(skills):
+            data[f'skillTitle_{number}'] = title
+            data[f'skillPercentage_{number}'] = value
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/user-insert-skill-detail/', data)
+        return response.json(), len(queries)
+
+    def test_valid_rows_in_one_insert(self):
+        self.assertEqual(self.post_skills(('Python', '80'))[0], {'success': True, 'created': 1, 'rejected': []})
+        # the resume is cached after the first request
+        _, one_row = self.post_skills(('Rust', '90'))
+        result, five_rows = self.post_skills(('Django', '70'), ('SQL', '50'), ('Git', '60'), ('Go', '40'), ('C', '30'))
+        self.assertEqual(result, {'success': True, 'created': 5, 'rejected': []})
+        self.assertEqual(five_rows, one_row)
+
+    def test_one_invalid_row_rejects_the_batch(self):
+        self.post_skills(('Python', '80'))
+        response = self.client.post('/user-insert-skill-detail/', {
+            'skillTitle_0': 'Django', 'skillPercentage_0': '70', 'skillTitle_1': '', 'skillPercentage_1': '50',
+            'skillTitle_2': 'SQL', 'skillPercentage_2': '50',
+        })
+        self.assertEqual(response.status_code, 400)
+        result = response.json()
+        self.assertEqual((result['success'], result['created']), (False, 0))
+        self.assertEqual([row['row'] for row in result['rejected']], [1])
+        self.assertIn('skill_type', result['rejected'][0]['errors'])
+        self.assertEqual(list(SkillInfo.objects.filter(user_info=self.resume).values_list('skill_type', flat=True)),
+                         ['Python'])
+
+    @override_settings(TASK_QUEUE_EAGER=True)
+    def test_the_batch_is_indexed_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.post_skills(('Python', '80'), ('Django', '70'), ('Docker', '60'))
+        self.assertEqual(len(callbacks), 3)
+        self.assertEqual(sorted(self.resume.skill_tags.values_list('skill', flat=True)), ['Django', 'Docker', 'Python'])
+        self.assertTrue(ResumeSectionVector.objects.filter(resume=self.resume, section='skills').exists())
+        self.assertIsNotNone(ResumeSignature.objects.filter(resume=self.resume).first())
+
+    def test_experience_rows_get_their_plain_text(self):
+        self.client.post('/user-insert-work-detail/', {
+            'companyTitle_0': 'Acme', 'jobTitle_0': 'Developer', 'jobStart_0': '2020-01-01', 'jobEnd_0': '2021-01-01',
+            'job_description_0': '<p>Built <strong>Django</strong> services for the payments team</p>',
+        })
+        self.assertIn('Built **Django** services', self.resume.user_professional_info.get().official_description_text)
+
+
+@override_settings(TASK_QUEUE_EAGER=True, RESUME_SCORER='cosine')
+class ResumeTermVectorTest(TestCase):
+    def setUp(self):
+        admin = User.objects.create_user('admin', 'admin@example.com', 'password')
+        self.user = User.objects.create_user('applicant', 'applicant@example.com', 'password')
+        self.resume = ResumePersonalInfo.objects.create(user=self.user)
+        self.job = Jobs.objects.create(user=admin, job_title='Developer', job_description='<p>Python and Django</p>')
+        self.application = AppliedJob.objects.create(user=self.user, apply_job=self.job)
+
+    def add_experience(self, description):
+        with self.captureOnCommitCallbacks(execute=True):
+            ProfessionalExperienceInfo.objects.create(user_info=self.resume, official_description=description)
+
+    def test_experience_writes_rebuild_the_vector_and_rescore(self):
+        self.add_experience('<p>Python services</p>')
+        vector = ResumeTermVector.objects.get(resume=self.resume)
+        self.assertEqual(vector.terms, dict(text_to_terms('<p>Python services</p>')))
+        self.assertEqual(vector.norm, vector_norm(vector.terms))
+        self.application.refresh_from_db()
+        self.assertGreater(self.application.similarity_score, 0)
+
+        self.add_experience('<p>Django APIs</p>')
+        terms = text_to_terms('<p>Python services</p>') + text_to_terms('<p>Django APIs</p>')
+        self.assertEqual(ResumeTermVector.objects.get(resume=self.resume).terms, dict(terms))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ProfessionalExperienceInfo.objects.filter(user_info=self.resume).delete()
+        self.assertEqual(ResumeTermVector.objects.get(resume=self.resume).terms, {})
+        self.application.refresh_from_db()
+        self.assertEqual(self.application.similarity_score, 0)
+
+
+class TalentIndexTest(TestCase):
+    words = ['python', 'django', 'java', 'spring', 'sql', 'react', 'docker', 'aws', 'linux', 'git', 'go', 'rust']
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.user = User.objects.create_user('applicant', 'applicant@example.com', 'password')
+        self.random = random.Random(7)
+        for _ in range(60):
+            self.add_vector(ResumePersonalInfo.objects.create(user=self.user))
+
+    def random_terms(self):
+        return {word: self.random.randint(1, 9) for word in self.random.sample(self.words, self.random.randint(1, 6))}
+
+    def add_vector(self, resume):
+        terms = self.random_terms()
+        return ResumeTermVector.objects.create(
+            resume=resume, terms=terms, norm=vector_norm(terms), pipeline=pipeline_stamp()
+        )
+
+    def brute_force(self, query_terms, query_norm):
+        scores = {}
+        for vector in ResumeTermVector.objects.exclude(norm=0):
+            scores[vector.resume_id] = sum(
+                count / query_norm * vector.terms.get(term, 0) / vector.norm for term, count in query_terms.items()
+            )
+        return scores
+
+    def assert_top_k_matches_brute_force(self, k):
+        index = TalentIndex(self.directory)
+        for _ in range(10):
+            query_terms = self.random_terms()
+            query_norm = vector_norm(query_terms)
+            results, _ = index.top_k(query_terms, query_norm, k)
+            scores = self.brute_force(query_terms, query_norm)
+            expected = sorted((score for score in scores.values() if score > 0), reverse=True)[:k]
+            self.assertEqual(len(results), len(expected))
+            for (resume_id, score), expected_score in zip(results, expected):
+                self.assertAlmostEqual(score, expected_score)
+                self.assertAlmostEqual(score, scores[resume_id])
+
+    def test_top_k_matches_brute_force_cosine(self):
+        build_index(self.directory, full=True)
+        for k in (1, 5, 20, 100):
+            self.assert_top_k_matches_brute_force(k)
+
+    def test_incremental_build_matches_a_full_build(self):
+        build_index(self.directory, full=True)
+        vectors = list(ResumeTermVector.objects.order_by('id')[:3])
+        vectors[0].terms = self.random_terms()
+        vectors[0].norm = vector_norm(vectors[0].terms)
+        vectors[0].save()
+        vectors[1].resume.delete()
+        vectors[2].terms, vectors[2].norm = {}, 0
+        vectors[2].save()
+        self.add_vector(ResumePersonalInfo.objects.create(user=self.user))
+
+        build_index(self.directory)
+        self.assert_top_k_matches_brute_force(10)
+        full_directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, full_directory)
+        build_index(full_directory, full=True)
+        self.assertEqual(read_postings(self.directory)[1], read_postings(full_directory)[1])
+        # only the current postings file and the one before it are kept
+        self.assertEqual(len([name for name in os.listdir(self.directory) if name.endswith('.bin')]), 2)
+
+
+class CorpusScorersTest(SimpleTestCase):
+    job_terms = {'python': 2, 'django': 1, 'rust': 1}
+    resume_terms = [{'python': 3, 'sql': 2}, {'django': 1, 'rust': 4, 'go': 1}, {'java': 5}, {}]
+
+    def vectors(self):
+        return [SimpleNamespace(terms=terms, norm=vector_norm(terms), length=sum(terms.values()))
+                for terms in self.resume_terms]
+
+    def test_tfidf_weights_the_job_side_only(self):
+        statistics = (10, 3.0, np.array([4.0, 1.0, 0.0]))
+        idf = {term: math.log(11 / (frequency + 1)) + 1 for term, frequency in zip(self.job_terms, [4, 1, 0])}
+        job_norm = math.sqrt(sum((count * idf[term]) ** 2 for term, count in self.job_terms.items()))
+        expected = [
+            sum(count * idf[term] * terms.get(term, 0) for term, count in self.job_terms.items())
+            / (vector_norm(terms) * job_norm) if terms else 0
+            for terms in self.resume_terms
+        ]
+        np.testing.assert_allclose(batch_tfidf_scores(self.job_terms, self.vectors(), statistics), expected)
+
+    @override_settings(BM25_K1=1.2, BM25_B=0.75)
+    def test_bm25_matches_the_textbook_formula(self):
+        frequencies = [4, 1, 0]
+        statistics = (10, 4.0, np.array(frequencies, dtype=float))
+        expected = []
+        for terms in self.resume_terms:
+            score = 0
+            for (term, count), frequency in zip(self.job_terms.items(), frequencies):
+                idf = math.log(1 + (10 - frequency + 0.5) / (frequency + 0.5))
+                tf = terms.get(term, 0)
+                score += count * idf * tf * 2.2 / (tf + 1.2 * (1 - 0.75 + 0.75 * sum(terms.values()) / 4.0))
+            expected.append(score)
+        np.testing.assert_allclose(batch_bm25_scores(self.job_terms, self.vectors(), statistics), expected)
+
+
+@override_settings(TASK_QUEUE_EAGER=True)
+class CorpusStatisticsTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('applicant', 'applicant@example.com', 'password')
+        self.resumes = [ResumePersonalInfo.objects.create(user=self.user) for _ in range(3)]
+
+    def add_experience(self, resume, description):
+        with self.captureOnCommitCallbacks(execute=True):
+            return ProfessionalExperienceInfo.objects.create(user_info=resume, official_description=description)
+
+    def statistics(self):
+        corpus = CorpusStatistics.objects.get(pk=1)
+        frequencies = dict(TermDocumentFrequency.objects.filter(document_count__gt=0)
+                           .values_list('term', 'document_count'))
+        return corpus.document_count, corpus.total_length, frequencies
+
+    def scores(self, scorer):
+        vectors = list(ResumeTermVector.objects.order_by('resume_id'))
+        return score_term_vectors(Counter(text_to_terms('<p>Python Django services and SQL</p>')), vectors, scorer)
+
+    def assert_matches_recount(self):
+        incremental = self.statistics(), self.scores('tfidf'), self.scores('bm25')
+        recount_corpus_statistics()
+        self.assertEqual(self.statistics(), incremental[0])
+        np.testing.assert_allclose(self.scores('tfidf'), incremental[1])
+        np.testing.assert_allclose(self.scores('bm25'), incremental[2])
+
+    def test_incremental_statistics_match_a_full_recount(self):
+        experience = self.add_experience(self.resumes[0], '<p>Python and Django services</p>')
+        self.add_experience(self.resumes[1], '<p>Java services with SQL</p>')
+        self.add_experience(self.resumes[2], '<p>Python scripts</p>')
+        self.assert_matches_recount()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            experience.official_description = '<p>Rust services and SQL tuning</p>'
+            experience.save()
+        self.assert_matches_recount()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            experience.delete()
+        self.assert_matches_recount()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.resumes[1].delete()
+        self.assert_matches_recount()
+        self.assertEqual(self.statistics()[0], 2)
+
+
+@override_settings(TASK_QUEUE_EAGER=True, RESUME_SCORER='cosine', JOB_FEED_SIZE=2, JOB_FEED_RESERVE=1, JOBS_PER_PAGE=2)
+class RankedJobFeedTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user('admin', 'admin@example.com', 'password')
+        self.user = User.objects.create_user('applicant', 'applicant@example.com', 'password')
+        self.resume = ResumePersonalInfo.objects.create(user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.experience = ProfessionalExperienceInfo.objects.create(
+                user_info=self.resume, official_description='<p>Python and Django services</p>'
+            )
+        self.jobs = {
+            title: Jobs.objects.create(user=self.admin, job_title=title, job_description=f'<p>{description}</p>')
+            for title, description in [('python', 'Python and Django developer'), ('java', 'Java and Spring'),
+                                       ('django', 'Django services'), ('rust', 'Rust systems'), ('go', 'Go tooling')]
+        }
+        self.client.force_login(self.user)
+
+    def feed(self):
+        return [job.job_title for job in recommended_jobs(ResumePersonalInfo.objects.get(pk=self.resume.pk))]
+
+    def test_ranked_head_then_every_other_active_job(self):
+        self.assertEqual(self.feed(), ['django', 'python', 'go', 'rust', 'java'])
+
+        # pages inside the head, inside the rest and across both
+        for size in (2, 3):
+            with override_settings(JOBS_PER_PAGE=size):
+                pages = [self.client.get('/user-jobs/').context['jobs']]
+                while pages[-1].has_next:
+                    with CaptureQueriesContext(connection) as queries:
+                        pages.append(self.client.get(f'/user-jobs/?after={pages[-1].next_cursor}').context['jobs'])
+                    sql = ' '.join(query['sql'] for query in queries)
+                    self.assertNotIn('OFFSET', sql)
+                    self.assertNotIn('COUNT(', sql)
+                self.assertEqual([job.job_title for page in pages for job in page], self.feed())
+
+                for page, previous in zip(pages[:0:-1], pages[-2::-1]):
+                    back = self.client.get(f'/user-jobs/?before={page.previous_cursor}').context['jobs']
+                    self.assertEqual((list(back), back.start_index), (list(previous), previous.start_index))
+                self.assertFalse(back.has_previous)
+
+    def test_cached_feed_follows_job_and_resume_changes(self):
+        self.assertEqual(self.feed()[:2], ['django', 'python'])
+
+        rust = self.jobs['rust']
+        rust.job_description = '<p>Python, Django and Django services</p>'
+        rust.save()
+        self.assertEqual(self.feed()[0], 'rust')
+
+        self.jobs['django'].is_active = False
+        self.jobs['django'].save()
+        self.assertNotIn('django', self.feed())
+
+        Jobs.objects.create(user=self.admin, job_title='new', job_description='<p>Python services and Django</p>')
+        self.assertIn('new', self.feed()[:2])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.experience.official_description = '<p>Java and Spring</p>'
+            self.experience.save()
+        self.assertEqual(self.feed()[0], 'java')
+
+    def test_a_job_change_only_rescores_that_job(self):
+        self.assertEqual(self.feed()[:2], ['django', 'python'])
+        resume_vector = ResumeTermVector.objects.get(resume=self.resume)
+        go = self.jobs['go']
+        go.job_description = '<p>Django services in Python</p>'
+        go.save()
+        for expected in ([go.id, self.jobs['django'].id], [go.id, self.jobs['django'].id]):
+            # the vectors rebuilt since the last look, and the ranked jobs still being active
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(recommended_job_ids(resume_vector), expected)
+            self.assertEqual(len(queries), 2)
+            self.assertFalse([query for query in queries if 'COUNT(' in query['sql'] or 'MAX(' in query['sql']])
+
+        go.delete()
+        self.assertEqual(self.feed()[:2], ['django', 'python'])
+
+
+@override_settings(TASK_QUEUE_EAGER=True, RESUME_SCORER='multifield')
+class MultifieldScorerTest(TestCase):
+    def setUp(self):
+        admin = User.objects.create_user('admin', 'admin@example.com', 'password')
+        self.user = User.objects.create_user('applicant', 'applicant@example.com', 'password')
+        self.resume = ResumePersonalInfo.objects.create(user=self.user)
+        self.job = Jobs.objects.create(
+            user=admin, job_title='Developer',
+            job_description='<p>Python developer with Django and a computer science degree</p>'
+        )
+        self.application = AppliedJob.objects.create(user=self.user, apply_job=self.job)
+
+    def sections(self):
+        return {vector.section: vector for vector in ResumeSectionVector.objects.filter(resume=self.resume)}
+
+    def expected_score(self):
+        job_terms = Counter(self.job.term_vector.terms)
+        job_norm = vector_norm(job_terms)
+        vectors = {'experience': ResumeTermVector.objects.get(resume=self.resume), **self.sections()}
+        weights = settings.RESUME_SECTION_WEIGHTS
+        return sum(
+            weight * cosine_from_vectors(job_terms, job_norm, vectors[section].terms, vectors[section].norm)
+            for section, weight in weights.items() if section in vectors
+        ) / sum(weights.values())
+
+    def test_each_section_is_rebuilt_on_its_own_and_rescored(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            ProfessionalExperienceInfo.objects.create(user_info=self.resume, official_description='<p>Python APIs</p>')
+        self.assertEqual(self.sections(), {})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            skill = SkillInfo.objects.create(user_info=self.resume, skill_type='Django')
+            SkillInfo.objects.create(user_info=self.resume, skill_type='Python')
+        self.assertEqual(list(self.sections()), ['skills'])
+        self.assertEqual(self.sections()['skills'].terms, dict(text_to_terms('Django\nPython')))
+        skills_updated_at = self.sections()['skills'].updated_at
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ResumeEducationInfo.objects.create(user_info=self.resume, degree_description='Computer science degree')
+        self.assertEqual(self.sections()['skills'].updated_at, skills_updated_at)
+        self.application.refresh_from_db()
+        self.assertAlmostEqual(self.application.similarity_score, self.expected_score())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            skill.delete()
+        self.assertEqual(self.sections()['skills'].terms, dict(text_to_terms('Python')))
+        self.application.refresh_from_db()
+        self.assertAlmostEqual(self.application.similarity_score, self.expected_score())
+        self.assertGreater(self.application.similarity_score, 0)
+
+
+class SkillExtractionTest(SimpleTestCase):
+    def test_aliases_map_to_the_canonical_skill(self):
+        self.assertEqual(
+            extract_skills('Deployed with k8s, Postgres and python3'), ['Kubernetes', 'PostgreSQL', 'Python']
+        )
+        self.assertEqual(extract_skills('GOLANG services on Amazon Web Services'), ['AWS', 'Go'])
+
+    def test_overlapping_spellings_keep_the_longest_match(self):
+        self.assertEqual(extract_skills('Node.js backend'), ['Node.js'])
+        self.assertEqual(extract_skills('Ruby on Rails and plain Ruby scripts'), ['Ruby', 'Ruby on Rails'])
+        self.assertEqual(extract_skills('Ruby on Rails apps'), ['Ruby on Rails'])
+        self.assertEqual(extract_skills('REST APIs in JS'), ['JavaScript', 'REST'])
+
+    def test_matches_only_whole_words(self):
+        self.assertEqual(extract_skills('javascripting, restful, gitops'), ['REST'])
+        self.assertEqual(extract_skills(''), [])
+
+
+@override_settings(TASK_QUEUE_EAGER=True, RESUME_SCORER='cosine', TOKEN_PIPELINE=['stopwords', 'stem'])
+class PipelineStampTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        admin = User.objects.create_user('admin', 'admin@example.com', 'password')
+        self.user = User.objects.create_user('applicant', 'applicant@example.com', 'password')
+        self.resume = ResumePersonalInfo.objects.create(user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            ProfessionalExperienceInfo.objects.create(
+                user_info=self.resume, official_description='<p>Testing the Django services</p>'
+            )
+        self.job = Jobs.objects.create(user=admin, job_title='Developer', job_description='<p>Django testing</p>')
+        self.application = AppliedJob.objects.create(user=self.user, apply_job=self.job)
+
+    def test_vectors_are_stamped_and_rebuilt_for_another_pipeline(self):
+        self.assertEqual(ResumeTermVector.objects.get(resume=self.resume).pipeline, 'stopwords,stem')
+        self.assertEqual(job_term_vector(Jobs.objects.get(pk=self.job.pk)).pipeline, 'stopwords,stem')
+
+        with override_settings(TOKEN_PIPELINE=['stopwords']):
+            job_vector = job_term_vector(Jobs.objects.get(pk=self.job.pk))
+            self.assertEqual((job_vector.pipeline, job_vector.terms), ('stopwords', {'django': 1, 'testing': 1}))
+            score_applications(self.job, [self.application])
+            self.assertEqual(ResumeTermVector.objects.get(resume=self.resume).terms,
+                             {'testing': 1, 'django': 1, 'services': 1})
+
+    def test_stale_resume_vector_is_not_ranked_until_rebuilt(self):
+        with override_settings(TOKEN_PIPELINE=['stopwords']):
+            with self.captureOnCommitCallbacks(execute=True):
+                jobs = recommended_jobs(ResumePersonalInfo.objects.get(pk=self.resume.pk))
+            self.assertIsInstance(jobs, QuerySet)
+            self.assertEqual(ResumeTermVector.objects.get(resume=self.resume).pipeline, 'stopwords')
+            jobs = recommended_jobs(ResumePersonalInfo.objects.get(pk=self.resume.pk))
+            self.assertIsInstance(jobs, RankedJobFeed)
+            self.assertEqual([job.id for job in jobs], [self.job.id])
+
+    def test_talent_index_of_another_pipeline_is_not_used(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        with override_settings(TALENT_INDEX_DIR=directory):
+            build_index()
+            self.assertIsNotNone(get_talent_index())
+            with override_settings(TOKEN_PIPELINE=['stopwords']):
+                self.assertIsNone(get_talent_index())
+
+    def test_ann_index_of_another_width_is_not_used(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.client.force_login(self.user)
+        with override_settings(ANN_INDEX_DIR=directory, TALENT_SEARCH_ENGINE='ann'):
+            build_ann_index(directory)
+            self.assertIsNotNone(get_ann_index())
+            for changed in ({'HASHED_VECTOR_DIMENSION': 2 ** 10}, {'ANN_PROJECTION_DIM': 64}):
+                with override_settings(**changed):
+                    self.assertIsNone(get_ann_index())
+                    response = self.client.get(f'/admin-talent-search/{self.job.id}/')
+                    self.assertEqual(response.status_code, 200)
+                    self.assertIn('build_ann_index', str(list(response.context['messages'])[0]))
+
+
+@override_settings(TASK_QUEUE_EAGER=True, RESUME_SCORER='cosine')
+class RescoreCommandTest(TestCase):
+    def setUp(self):
+        admin = User.objects.create_user('admin', 'admin@example.com', 'password')
+        self.job = Jobs.objects.create(user=admin, job_title='Developer', job_description='<p>Python and Django</p>')
+        for number in range(3):
+            user = User.objects.create_user(f'user{number}', f'user{number}@example.com', 'password')
+            resume = ResumePersonalInfo.objects.create(user=user)
+            with self.captureOnCommitCallbacks(execute=True):
+                ProfessionalExperienceInfo.objects.create(user_info=resume, official_description='<p>Python APIs</p>')
+            AppliedJob.objects.create(user=user, apply_job=self.job)
+        ResumeTermVector.objects.all().delete()
+
+    def test_workers_only_read(self):
+        application_ids = list(AppliedJob.objects.values_list('id', flat=True))
+        scores = score_chunk(self.job.id, application_ids)
+        self.assertEqual([score for _, score in scores], [0, 0, 0])
+        self.assertFalse(ResumeTermVector.objects.exists())
+
+    def test_missing_vectors_are_built_before_scoring(self):
+        output = StringIO()
+        call_command('rescore', workers=1, stdout=output)
+        self.assertIn('Built 3 missing or stale term vectors', output.getvalue())
+        self.assertEqual(ResumeTermVector.objects.count(), 3)
+        self.assertFalse(AppliedJob.objects.filter(similarity_score=0).exists())
+
+
+class BenchmarkCommandTest(SimpleTestCase):
+    def test_named_benchmarks_share_one_json_report(self):
+        output = StringIO()
+        call_command('benchmark', benchmarks='tokenizer,hashing', documents=6, queries=2, dimensions='64', top=3,
+                     repeat=1, output='-', stdout=output, stderr=StringIO())
+        results = json.loads(output.getvalue())['results']
+        self.assertEqual(sorted(results), ['hashing/64', 'hashing/batch_cosine', 'hashing/exact',
+                                           'tokenizer/html2text', 'tokenizer/html_tokens'])
+        self.assertEqual(results['tokenizer/html_tokens']['token_mismatches'], 0)
+        self.assertIn('top_overlap', results['hashing/64'])
+
+    def test_unknown_benchmark_is_rejected(self):
+        with self.assertRaises(CommandError):
+            call_command('benchmark', benchmarks='tokenizer,typo', stdout=StringIO())
@@ -0,0 +1,258 @@
+import html.entities
+import re
+import string
+
+from html.parser import HTMLParser
+
+from html2text import config as html2text_config
+from html2text.utils import control_character_replacements, hn, unifiable_n
+
+ASCII_DELETE = str.maketrans('', '', ''.join(
+    char for char in map(chr, range(128)) if not (char.isalnum() or char.isspace())
+))
+ASCII_ALNUM = set(string.ascii_letters + string.digits)
+ABSOLUTE_URL = re.compile(r'^[a-zA-Z+]+://')
+STRESSED_SEPARATOR = re.compile(r'[^][(){}\s.!?]')
+NBSP_PLACEHOLDER = '&nbsp_place_holder;'
+EMPHASIS_MARKS = {'em': '_', 'i': '_', 'u': '_', 'strong': '**', 'b': '**', 'del': '~~', 'strike': '~~', 's': '~~'}
+
+
+def clean_chunk(text):
+    # same character rules as preprocess_text: keep ascii letters/digits, whitespace separates, the rest vanishes
+    text = text.lower()
+    if text.isascii():
+        return text.translate(ASCII_DELETE)
+    return ''.join(char for char in text if char in ASCII_ALNUM or char.isspace())
+
+
+class HtmlTokenizer(HTMLParser):
+    # single streaming pass over CKEditor HTML yielding the token multiset of preprocess_text(html2text(html)).
+    # Only the html2text state that decides where words are split or glued together is tracked: block breaks,
+    # emphasis spacing, list numbers and the link/image urls it prints, everything else is dropped unbuilt.
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.tokens = []
+        self.pending = ''
+        self.line_broken = False
+        self.bracket_written = False
+        self.quiet = 0
+        self.lists = []
+        self.last_was_list = False
+        self.astack = []
+        self.maybe_automatic_link = None
+        self.empty_link = False
+        self.split_next_td = False
+        self.stressed = False
+        self.preceding_stressed = False
+        self.preceding_data = ''
+        self.current_tag = ''
+
+    def flush(self):
+        if self.pending:
+            self.tokens.append(self.pending)
+            self.pending = ''
+
+    def line_break(self):
+        # html2text only prints pending newlines together with the next output, and some tags cancel them
+        self.line_broken = True
+
+    def write(self, text):
+        if self.quiet or not text:
+            return
+        if self.line_broken:
+            self.flush()
+            self.line_broken = False
+        self.bracket_written = False
+        cleaned = clean_chunk(text)
+        if not cleaned:
+            return
+        words = cleaned.split()
+        if not words:
+            self.flush()
+            return
+        if cleaned[0].isspace():
+            self.flush()
+        words[0] = self.pending + words[0]
+        self.pending = words.pop()
+        self.tokens.extend(words)
+        if cleaned[-1].isspace():
+            self.flush()
+
+    def open_link_text(self):
+        self.maybe_automatic_link = None
+        self.empty_link = False
+        self.write('[')
+        self.bracket_written = True
+
+    def handle_starttag(self, tag, attrs):
+        self.handle_tag(tag, dict(attrs), True)
+
+    def handle_endtag(self, tag):
+        self.handle_tag(tag, {}, False)
+
+    def handle_tag(self, tag, attrs, start):
+        self.current_tag = tag
+        if start and self.maybe_automatic_link is not None and tag not in ('p', 'div', 'style', 'dl', 'dt', 'img'):
+            self.open_link_text()
+
+        if hn(tag):
+            if self.astack:
+                if start and self.bracket_written:
+                    self.write('# [')
+                elif not start:
+                    self.line_broken = False
+                return
+            self.line_break()
+            if not start:
+                return
+            self.write('# ')
+        if tag in ('p', 'div') and not self.astack and not self.split_next_td:
+            self.line_break()
+        if tag == 'br' and start:
+            self.write('  \n')
+        if tag == 'hr' and start:
+            self.line_break()
+            self.write('* * *')
+            self.line_break()
+        if tag in ('head', 'style', 'script'):
+            self.quiet += 1 if start else -1
+        if tag == 'body':
+            self.quiet = 0
+        if tag == 'blockquote':
+            self.line_break()
+            if start:
+                self.write('> ')
+
+        if tag in EMPHASIS_MARKS:
+            mark = EMPHASIS_MARKS[tag]
+            last = self.preceding_data[-1:]
+            # html2text pads the emphasis mark with a space when it would otherwise merge into the previous text
+            if tag in ('em', 'i', 'u'):
+                padded = last and last not in string.whitespace and last not in string.punctuation
+            else:
+                padded = last == mark[0]
+            if start and padded:
+                mark = ' ' + mark
+                self.preceding_data += ' '
+            self.write(mark)
+            if start:
+                self.stressed = True
+        if tag in ('kbd', 'code', 'tt', 'q'):
+            self.write('`')
+
+        if tag == 'a':
+            if start:
+                href = attrs.get('href')
+                if href is not None and not href.startswith('#'):
+                    self.astack.append(attrs)
+                    self.maybe_automatic_link = href
+                    self.empty_link = True
+                else:
+                    self.astack.append(None)
+            elif self.astack:
+                link = self.astack.pop()
+                if self.maybe_automatic_link and not self.empty_link:
+                    self.maybe_automatic_link = None
+                elif link:
+                    if self.empty_link:
+                        self.open_link_text()
+                    self.line_broken = False
+                    title = link.get('title') or ''
+                    self.write('](' + link['href'] + (' "{}"'.format(title) if title.strip() else '') + ')')
+
+        if tag == 'img' and start and attrs.get('src') is not None:
+            if self.maybe_automatic_link is not None:
+                self.open_link_text()
+            self.write('![' + (attrs.get('alt') or '') + '](' + attrs['src'] + ')')
+
+        if (tag == 'dl' and start) or (tag in ('dt', 'dd') and not start):
+            self.line_break()
+        if tag == 'dd' and start:
+            self.write('    ')
+
+        if tag in ('ol', 'ul'):
+            if not self.lists and not self.last_was_list:
+                self.line_break()
+            if start:
+                try:
+                    number = int(attrs['start']) - 1 if 'start' in attrs else 0
+                except ValueError:
+                    number = 0
+                self.lists.append([tag, number])
+            elif self.lists:
+                self.lists.pop()
+                if not self.lists:
+                    self.write('\n')
+            self.last_was_list = True
+        else:
+            self.last_was_list = False
+
+        if tag == 'li':
+            self.line_break()
+            if start and self.lists and self.lists[-1][0] == 'ol':
+                self.lists[-1][1] += 1
+                self.write('{}. '.format(self.lists[-1][1]))
+            elif start:
+                self.write('* ')
+
+        if tag in ('td', 'th') and start:
+            if self.split_next_td:
+                self.write('| ')
+            self.split_next_td = True
+        if tag == 'tr' and not start:
+            self.split_next_td = False
+            self.line_break()
+        if tag == 'pre':
+            self.line_break()
+
+    def handle_charref(self, name):
+        code = int(name[1:], 16) if name[0] in 'xX' else int(name)
+        if not 0 < code < 0x110000 or 0xD800 <= code < 0xE000:
+            code = 0xFFFD
+        code = control_character_replacements.get(code, code)
+        self.handle_data(unifiable_n.get(code) or chr(code))
+
+    def handle_entityref(self, name):
+        if name == 'nbsp':
+            data = NBSP_PLACEHOLDER
+        elif name in html2text_config.UNIFIABLE:
+            data = html2text_config.UNIFIABLE[name]
+        else:
+            data = html.entities.html5.get(name + ';', '&' + name + ';')
+        if data:
+            self.handle_data(data)
+
+    def handle_data(self, data):
+        if not data:
+            return
+        if self.stressed:
+            data = data.strip()
+            self.stressed = False
+            self.preceding_stressed = True
+        elif self.preceding_stressed:
+            if STRESSED_SEPARATOR.match(data[0]) and not hn(self.current_tag) and \
+                    self.current_tag not in ('a', 'code', 'pre'):
+                data = ' ' + data
+            self.preceding_stressed = False
+
+        if self.maybe_automatic_link is not None:
+            # a link whose text is its own absolute url is printed once as <url>
+            if data == self.maybe_automatic_link and ABSOLUTE_URL.match(data):
+                self.empty_link = False
+                self.write(data)
+                return
+            self.open_link_text()
+
+        self.preceding_data = data
+        self.write(data.replace(NBSP_PLACEHOLDER, ' ') if NBSP_PLACEHOLDER in data else data)
+
+    def close(self):
+        super().close()
+        self.flush()
+        return self.tokens
+
+
+def html_tokens(html):
+    tokenizer = HtmlTokenizer()
+    tokenizer.feed(html or '')
+    return tokenizer.close()
@@ -4,6 +4,7 @@ from . import views
 urlpatterns = [
     path('', views.index, name='index'),
     path('jobs/', views.jobs, name='jobs'),
+    path('job-search/', views.job_search, name='job-search'),
     path('register/', views.register, name='register'),
     path('logout/', views.custom_logout, name='logout'),
     path('sent-email-forget/', views.sent_email_forget, name='sent-email-forget'),
@@ -17,6 +18,7 @@ urlpatterns = [
     path('admin-edit-email/<int:mail_id>/', views.admin_edit_email, name='admin-edit-email'),
     path('admin-delete-email/<int:mail_id>/', views.admin_delete_email, name='admin-delete-email'),
     path('admin-job-detail/<int:job_id>/', views.admins_job_details, name='admin-job-detail'),
+    path('admin-talent-search/<int:job_id>/', views.admins_talent_search, name='admin-talent-search'),
     path('admin-remove-resume/<int:job_id>/<int:apply_id>/', views.admin_remove_applicant, name='admin-remove-resume'),
     path('admin-email-detail/', views.admin_email_details, name='admin-email-detail'),
     path('admin-add-job/', views.admin_add_job, name='admin-add-job'),
@@ -1,30 +1,40 @@
-import math
-import re
 import bleach
 
 from collections import Counter
 from datetime import datetime
 
-import html2text
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import login, get_user_model, logout
 from django.contrib.auth.backends import ModelBackend
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth.views import PasswordChangeView
-from django.core.mail import send_mail
 from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import Prefetch, QuerySet
 from django.forms import modelformset_factory
 from django.http import HttpResponseRedirect, JsonResponse
 from django.shortcuts import render, redirect, get_object_or_404
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
 
+from classify_resume.duplicates import collapse_duplicate_applicants
+from classify_resume.middleware import get_resume
+from classify_resume.pagination import keyset_page, ranked_page, sequence_page
+from classify_resume.progress import resume_progress
 from classify_resume.forms import BasicRegForm, LoginForm, JobForm, EmailForm, AppliedJobForm, JobEditForm, \
     CustomPasswordChangeForm, EmailEditForm, ApplicantPersonalInfoForm, ApplicantEducationInfoForm, \
     ApplicantProfessionalInfoForm, ApplicantCertificateInfoForm, ApplicantSkillInfoForm, CustomForgetPasswordForm, \
     CustomEmailForgetPasswordForm
 from classify_resume.models import Jobs, ResumePersonalInfo, ResumeEducationInfo, ProfessionalExperienceInfo, SkillInfo, \
     AppliedJob, User, CertificateInfo, EmailContent
+from classify_resume.scoring import job_term_vector, vector_norm, hashed_vector, ckeditor_clean
+from classify_resume.recommendations import RankedJobFeed, recommended_jobs
+from classify_resume.salaries import salary_histogram
+from classify_resume.search import search_jobs
+from classify_resume.signals import resume_section_changed
+from classify_resume.talent_index import get_talent_index
+from classify_resume.ann_index import get_ann_index
+from classify_resume.tasks import enqueue
 
 
 class EmailBackend(ModelBackend):
@@ -40,45 +50,41 @@ class EmailBackend(ModelBackend):
         return None
 
 
-def preprocess_text(text):
-    return re.sub(r'[^a-zA-Z0-9\s]', '', text.lower())
-
-
-def calculate_cosine_similarity(text1, text2):
-    text1 = preprocess_text(text1)
-    text2 = preprocess_text(text2)
-
-    words1 = Counter(text1.split())
-    words2 = Counter(text2.split())
-
-    intersection = set(words1.keys()) & set(words2.keys())
-
-    dot_product = sum(words1[word] * words2[word] for word in intersection)
-    magnitude1 = math.sqrt(sum(words1[word] ** 2 for word in words1.keys()))
-    magnitude2 = math.sqrt(sum(words2[word] ** 2 for word in words2.keys()))
-
-    if magnitude1 == 0 or magnitude2 == 0:
-        return 0
-
-    return dot_product / (magnitude1 * magnitude2)
-
-
-def ckeditor_clean(text):
-    return html2text.html2text(text)
-
-
 def index(request):
     context = {}
     return render(request, "index.html", context)
 
 
 def jobs(request):
+    query = request.GET.get('q', '').strip()
+    search = search_jobs(query) if query else None
+    if query:
+        page = sequence_page(request, search, settings.JOBS_PER_PAGE)
+    else:
+        page = keyset_page(request, Jobs.objects.filter(is_active=True), ['-id'], settings.JOBS_PER_PAGE)
     context = {
-        'jobs': Jobs.objects.filter(is_active=True)
+        'jobs': page,
+        'query': query,
+        'search': search
     }
     return render(request, "jobs.html", context)
 
 
+def job_search(request):
+    search = search_jobs(request.GET.get('q', ''))
+    results = [
+        {
+            'id': job.id,
+            'title': job.highlighted_title,
+            'snippet': job.snippet,
+            'url': reverse('job-detail', kwargs={'job_id': job.id}),
+        }
+        for job in search
+    ]
+    # truncated: more than JOB_SEARCH_CANDIDATES jobs matched and only the newest of them were ranked
+    return JsonResponse({'results': results, 'matches': search.matches, 'truncated': search.truncated})
+
+
 def custom_logout(request):
     logout(request)
     messages.info(request, 'USER logout successfully')
@@ -130,12 +136,11 @@ def sent_email_forget(request):
         forget_email_form = CustomEmailForgetPasswordForm(request.POST)
         if forget_email_form.is_valid():
             user_email = forget_email_form.cleaned_data.get('email')
-            send_mail(
-                settings.RESET_PASSWORD,
-                f"{ settings.HOST_BASED_PATH }/forget-password/",
-                settings.EMAIL_HOST_USER,
-                [user_email],
-                fail_silently=False,
+            enqueue(
+                'send_mail',
+                subject=settings.RESET_PASSWORD,
+                message=f"{ settings.HOST_BASED_PATH }/forget-password/",
+                recipients=[user_email],
             )
             messages.info(request, 'Please check email for reset password')
             return redirect('index')
@@ -184,47 +189,102 @@ def job_detail(request, job_id):
 @login_required(login_url='register')
 def admins_panel(request):
     context = {
-        'jobs': Jobs.objects.filter(user=request.user)
+        'jobs': keyset_page(request, Jobs.objects.filter(user=request.user), ['-id'], settings.JOBS_PER_PAGE)
     }
     return render(request, "admin-job-listing.html", context)
 
 
 @login_required(login_url='register')
 def admins_job_details(request, job_id):
-    salary_counts = {}
-    salary_ranges = [(0, 50000), (50001, 100000), (100001, 150000), (150001, 200000), (200001, 999999999)]
-    jd = ckeditor_clean(Jobs.objects.get(id=job_id, is_active=True).job_description)
-    applicants = AppliedJob.objects.filter(apply_job=job_id, is_deleted=False)
-    for applied_user in applicants:
-        resume_text = ''
-        for office_text in applied_user.user.user_resume.first().user_professional_info.all():
-            resume_text += office_text.official_description
-        cleaned_job_text = ckeditor_clean(resume_text)
-        applied_user.similarity_score = calculate_cosine_similarity(jd, cleaned_job_text)
-
-    sorted_applicants = sorted(applicants, key=lambda x: x.similarity_score, reverse=True)
-
-    if sorted_applicants:
-        top_rated = sorted_applicants[0]
+    current_job = get_object_or_404(Jobs, pk=job_id, is_active=True)
+    applicants = AppliedJob.objects.filter(apply_job=job_id, is_deleted=False).order_by('-similarity_score', 'id')
+    skill = request.GET.get('skill')
+    collapse = request.GET.get('collapse') == '1'
+
+    # scores are filled in by the score_application task, until then every applicant is at 0 and the
+    # first one in id order is no better than the rest
+    top_rated = applicants.first()
+    if top_rated and top_rated.similarity_score > 0 and top_rated.apply_status != 'Short Listed':
         top_rated.apply_status = 'Short Listed'
-        top_rated.save()
-
-    for salary_range in salary_ranges:
-        lower_bound, upper_bound = salary_range
-        count = applicants.filter(expected_salary__range=(lower_bound, upper_bound)).count()
-        salary_counts[f"{lower_bound}-{upper_bound}"] = count
-
-    labels = list(salary_counts.keys())
-    counts = list(salary_counts.values())
+        top_rated.save(update_fields=['apply_status'])
+
+    histogram = salary_histogram(current_job)
+    labels = [label for label, _ in histogram]
+    counts = [count for _, count in histogram]
+
+    if skill:
+        applicants = applicants.filter(user__user_resume__skill_tags__skill=skill).distinct()
+
+    # the rows show the first resume of each applicant, prefetched for the whole page instead of queried per row
+    rows = applicants.select_related('user').prefetch_related(Prefetch(
+        'user__user_resume',
+        queryset=ResumePersonalInfo.objects.order_by('id').only(
+            'user_id', 'user_image', 'user_full_name', 'user_contact_no', 'user_address'
+        ),
+        to_attr='resumes',
+    ))
+    duplicates = {}
+    if collapse:
+        # the whole ranking is in memory already, so the duplicates are dropped there and not with an
+        # id__in exclusion that a big cluster could push past SQLite's variable limit
+        kept, duplicates = collapse_duplicate_applicants(applicants)
+        page = sequence_page(request, kept, settings.APPLICANTS_PER_PAGE)
+        loaded = rows.in_bulk(page.object_list)
+        page.object_list = [loaded[application_id] for application_id in page.object_list if application_id in loaded]
+    else:
+        page = keyset_page(request, rows, ['-similarity_score', 'id'], settings.APPLICANTS_PER_PAGE)
+    for applicant in page:
+        applicant.duplicates = duplicates.get(applicant.id, 0)
+        applicant.resume = applicant.user.resumes[0] if applicant.user.resumes else None
 
     context = {
         'charts_label': labels,
         'charts_value': counts,
-        'applicants': sorted(applicants, key=lambda x: x.similarity_score, reverse=True)
+        'current_job': current_job,
+        'selected_skill': skill,
+        'collapse': collapse,
+        'applicants': page
     }
     return render(request, "admin.html", context)
 
 
+@login_required(login_url='register')
+def admins_talent_search(request, job_id):
+    current_job = get_object_or_404(Jobs, pk=job_id)
+    job_terms = Counter(job_term_vector(current_job).terms)
+    try:
+        k = int(request.GET.get('k', 20))
+    except ValueError:
+        k = 20
+    k = min(max(k, 1), settings.TALENT_SEARCH_MAX_K)
+    if settings.TALENT_SEARCH_ENGINE == 'ann':
+        talent_index, command = get_ann_index(), 'build_ann_index'
+    else:
+        talent_index, command = get_talent_index(), 'build_talent_index'
+    candidates = []
+    if talent_index is None:
+        messages.warning(
+            request, f'Talent pool index has not been built for the current TOKEN_PIPELINE and vector settings yet, '
+                     f'run manage.py {command}'
+        )
+    else:
+        if settings.TALENT_SEARCH_ENGINE == 'ann':
+            matches, stats = talent_index.nearest(hashed_vector(job_terms), k)
+        else:
+            matches, stats = talent_index.top_k(job_terms, vector_norm(job_terms), k=k)
+        resumes = ResumePersonalInfo.objects.in_bulk([resume_id for resume_id, _ in matches])
+        for resume_id, score in matches:
+            if resume_id in resumes:
+                resumes[resume_id].similarity_score = score
+                candidates.append(resumes[resume_id])
+
+    context = {
+        'current_job': current_job,
+        'candidates': candidates,
+    }
+    return render(request, "admin-talent-search.html", context)
+
+
 @login_required(login_url='register')
 def admin_remove_applicant(request, job_id, apply_id):
     applicant_data = AppliedJob.objects.get(id=apply_id)
@@ -268,7 +328,9 @@ def admin_edit_job(request, job_id):
         edit_job_form = JobEditForm(request.POST, request.FILES, instance=instance)
         if edit_job_form.is_valid():
             try:
-                edit_job_form.save()
+                edited_job = edit_job_form.save()
+                if 'job_description' in edit_job_form.changed_data:
+                    enqueue('rescore_job', job_id=edited_job.id)
                 return redirect('admin-panel')
             except Exception as e:
                 print(e)
@@ -336,17 +398,26 @@ def admin_add_email(request):
 @login_required(login_url='register')
 def users_panel(request):
     context = {
-        'applied_jobs': AppliedJob.objects.filter(user=request.user),
-        'user_info': ResumePersonalInfo.objects.filter(user_id=request.user.id).first()
+        'applied_jobs': AppliedJob.objects.filter(user=request.user)
     }
     return render(request, "user-applied-jobs.html", context)
 
 
 @login_required(login_url='register')
 def user_jobs(request):
+    query = request.GET.get('q', '').strip()
+    jobs = search_jobs(query) if query else recommended_jobs(get_resume(request))
+    if isinstance(jobs, RankedJobFeed):
+        page = ranked_page(request, jobs.head, jobs.rest, jobs.ordering, settings.JOBS_PER_PAGE)
+    elif isinstance(jobs, QuerySet):
+        page = keyset_page(request, jobs, ['-id'], settings.JOBS_PER_PAGE)
+    else:
+        # search results are ranked in memory and paged by position
+        page = sequence_page(request, jobs, settings.JOBS_PER_PAGE)
     context = {
-        "jobs": Jobs.objects.filter(is_active=True),
-        'user_info': ResumePersonalInfo.objects.filter(user_id=request.user.id).first()
+        "jobs": page,
+        'query': query,
+        'search': jobs if query else None
     }
     return render(request, "user-jobs.html", context)
 
@@ -368,7 +439,6 @@ def user_change_password(request):
             logged_in_user.save()
             return redirect('logout')
     context['change_pass_form'] = update_pass_form
-    context['user_info'] = ResumePersonalInfo.objects.filter(user_id=request.user.id).first()
     return render(request, "user-change-password.html", context)
 
 
@@ -388,18 +458,16 @@ def user_job_details(request, job_id):
             applied.apply_job = current_job
             applied.apply_date = datetime.now()
             applied.save()
+            enqueue('score_application', application_id=applied.id)
     context['current_job'] = current_job
     context['apply_form'] = apply_form
     context['already_applied'] = already_applied
-    context['user_info'] = ResumePersonalInfo.objects.filter(user_id=request.user.id).first()
     return render(request, "user-job-details.html", context)
 
 
 @login_required(login_url='register')
 def get_user_resume(request):
-    context = {
-        'user_info': ResumePersonalInfo.objects.filter(user_id=request.user.id).first()
-    }
+    context = {}
     return render(request, "user-resume.html", context)
 
 
@@ -407,7 +475,8 @@ def get_user_resume(request):
 def user_create_resume_personal(request):
     context = {}
     user1 = request.user
-    personal_record_exist = ResumePersonalInfo.objects.filter(user=request.user).exists()
+    user_info, progress = resume_progress(request.user)
+    personal_record_exist = progress['is_exist_personal']
     # if personal_record_exist:
     #     instance = ResumePersonalInfo.objects.filter(user=request.user).first()
     #     user_info_form = ApplicantPersonalInfoForm(instance=instance)
@@ -426,7 +495,7 @@ def user_create_resume_personal(request):
     #             ui_form.user = request.user
     #             ui_form.save()
     if personal_record_exist:
-        instance = ResumePersonalInfo.objects.get(user=user1)
+        instance = user_info
         user_info_form = ApplicantPersonalInfoForm(request.POST, request.FILES, instance=instance) \
             if request.method == 'POST' else ApplicantPersonalInfoForm(instance=instance)
     else:
@@ -439,14 +508,10 @@ def user_create_resume_personal(request):
         ui_form.save()
         return redirect('user-create-resume-edu')
 
-    context['is_exist_personal'] = personal_record_exist
-    context['is_exist_educational'] = ResumeEducationInfo.objects.filter(user_info__user_id=request.user).exists()
-    context['is_exist_professional'] = ProfessionalExperienceInfo.objects.filter(user_info__user_id=request.user).exists()
-    context['is_exist_skills'] = SkillInfo.objects.filter(user_info__user_id=request.user).exists()
-    context['is_exist_certi'] = CertificateInfo.objects.filter(user_info__user_id=request.user).exists()
+    context.update(progress)
     # context['personal_data'] = ResumePersonalInfo.objects.get(user=request.user)
     context['user_info_form'] = user_info_form
-    context['user_info'] = ResumePersonalInfo.objects.filter(user_id=request.user.id).first()
+    context['user_info'] = user_info
     return render(request, "user-create-resume-personal.html", context)
 
 
@@ -454,11 +519,11 @@ def user_create_resume_personal(request):
 def user_create_resume_education(request, education_id=None):
     context = {}
     education_instance = get_object_or_404(ResumeEducationInfo, pk=education_id) if education_id else None
-    resume_educational_exist = ResumeEducationInfo.objects.filter(user_info__user_id=request.user).exists()
+    user_info, progress = resume_progress(request.user)
     education_formset = modelformset_factory(
         ResumeEducationInfo,
         form=ApplicantEducationInfoForm,
-        extra=0 if resume_educational_exist else 1,
+        extra=0 if progress['is_exist_educational'] else 1,
     )
     if request.method == 'POST':
         formset_edu = education_formset(
@@ -470,7 +535,7 @@ def user_create_resume_education(request, education_id=None):
         if formset_edu.is_valid():
             instances = formset_edu.save(commit=False)
             for form in instances:
-                form.user_info = ResumePersonalInfo.objects.filter(user=request.user).first()
+                form.user_info = user_info
                 form.save()
             return redirect('user-create-resume-pro')
     else:
@@ -478,14 +543,10 @@ def user_create_resume_education(request, education_id=None):
             queryset=ResumeEducationInfo.objects.filter(user_info__user_id=request.user),
             prefix='education'
         )
-    context['is_exist_personal'] = ResumePersonalInfo.objects.filter(user=request.user).exists()
-    context['is_exist_educational'] = resume_educational_exist
-    context['is_exist_professional'] = ProfessionalExperienceInfo.objects.filter(user_info__user_id=request.user).exists()
-    context['is_exist_skills'] = SkillInfo.objects.filter(user_info__user_id=request.user).exists()
-    context['is_exist_certi'] = CertificateInfo.objects.filter(user_info__user_id=request.user).exists()
+    context.update(progress)
     context['education_instance'] = education_instance
     context['educa_info_form'] = formset_edu
-    context['user_info'] = ResumePersonalInfo.objects.filter(user_id=request.user.id).first()
+    context['user_info'] = user_info
     return render(request, "user-create-resume-education.html", context)
 
 
@@ -493,11 +554,11 @@ def user_create_resume_education(request, education_id=None):
 def user_create_resume_professional(request, profession_id=None):
     context = {}
     professional_instance = get_object_or_404(ProfessionalExperienceInfo, pk=profession_id) if profession_id else None
-    resume_professional_exist = ProfessionalExperienceInfo.objects.filter(user_info__user_id=request.user).exists()
+    user_info, progress = resume_progress(request.user)
     professional_formset = modelformset_factory(
         ProfessionalExperienceInfo,
         form=ApplicantProfessionalInfoForm,
-        extra=0 if resume_professional_exist else 1
+        extra=0 if progress['is_exist_professional'] else 1
     )
     if request.method == 'POST':
         formset_pro = professional_formset(
@@ -508,7 +569,7 @@ def user_create_resume_professional(request, profession_id=None):
         if formset_pro.is_valid():
             instances = formset_pro.save(commit=False)
             for form in instances:
-                form.user_info = ResumePersonalInfo.objects.filter(user=request.user).first()
+                form.user_info = user_info
                 form.save()
             return redirect('user-create-resume-ski')
     else:
@@ -516,14 +577,10 @@ def user_create_resume_professional(request, profession_id=None):
             queryset=ProfessionalExperienceInfo.objects.filter(user_info__user_id=request.user),
             prefix='profession'
         )
-    context['is_exist_personal'] = ResumePersonalInfo.objects.filter(user=request.user).exists()
-    context['is_exist_educational'] = ResumeEducationInfo.objects.filter(user_info__user_id=request.user).exists()
-    context['is_exist_professional'] = resume_professional_exist
-    context['is_exist_skills'] = SkillInfo.objects.filter(user_info__user_id=request.user).exists()
-    context['is_exist_certi'] = CertificateInfo.objects.filter(user_info__user_id=request.user).exists()
+    context.update(progress)
     context['professional_instance'] = professional_instance
     context['pro_info_form'] = formset_pro
-    context['user_info'] = ResumePersonalInfo.objects.filter(user_id=request.user.id).first()
+    context['user_info'] = user_info
     return render(request, "user-create-resume-professional.html", context)
 
 
@@ -531,11 +588,11 @@ def user_create_resume_professional(request, profession_id=None):
 def user_create_resume_certificate(request, certificate_id=None):
     context = {}
     certificate_instance = get_object_or_404(CertificateInfo, pk=certificate_id) if certificate_id else None
-    resume_certificate_exist = CertificateInfo.objects.filter(user_info__user_id=request.user).exists()
+    user_info, progress = resume_progress(request.user)
     certificate_formset = modelformset_factory(
         CertificateInfo,
         form=ApplicantCertificateInfoForm,
-        extra=0 if resume_certificate_exist else 1,
+        extra=0 if progress['is_exist_certi'] else 1,
     )
     if request.method == 'POST':
         formset_certi = certificate_formset(
@@ -547,7 +604,7 @@ def user_create_resume_certificate(request, certificate_id=None):
         if formset_certi.is_valid():
             instances = formset_certi.save(commit=False)
             for form in instances:
-                form.user_info = ResumePersonalInfo.objects.filter(user=request.user).first()
+                form.user_info = user_info
                 form.save()
             return redirect('user-resume')
     else:
@@ -556,14 +613,10 @@ def user_create_resume_certificate(request, certificate_id=None):
             prefix='certifi'
         )
 
-    context['is_exist_personal'] = ResumePersonalInfo.objects.filter(user=request.user).exists()
-    context['is_exist_educational'] = ResumeEducationInfo.objects.filter(user_info__user_id=request.user).exists()
-    context['is_exist_professional'] = ProfessionalExperienceInfo.objects.filter(user_info__user_id=request.user).exists()
-    context['is_exist_skills'] = SkillInfo.objects.filter(user_info__user_id=request.user).exists()
-    context['is_exist_certi'] = resume_certificate_exist
+    context.update(progress)
     context['certificate_instance'] = certificate_instance
     context['certi_info_form'] = formset_certi
-    context['user_info'] = ResumePersonalInfo.objects.filter(user_id=request.user.id).first()
+    context['user_info'] = user_info
     return render(request, "user-create-resume-certificate.html", context)
 
 
@@ -571,11 +624,11 @@ def user_create_resume_certificate(request, certificate_id=None):
 def user_create_resume_skill(request, skill_id=None):
     context = {}
     skill_instance = get_object_or_404(SkillInfo, pk=skill_id) if skill_id else None
-    resume_skill_exist = SkillInfo.objects.filter(user_info__user_id=request.user).exists()
+    user_info, progress = resume_progress(request.user)
     skill_formset = modelformset_factory(
         SkillInfo,
         form=ApplicantSkillInfoForm,
-        extra=0 if resume_skill_exist else 1
+        extra=0 if progress['is_exist_skills'] else 1
     )
     if request.method == 'POST':
         formset_skill = skill_formset(
@@ -586,7 +639,7 @@ def user_create_resume_skill(request, skill_id=None):
         if formset_skill.is_valid():
             instances = formset_skill.save(commit=False)
             for form in instances:
-                form.user_info = ResumePersonalInfo.objects.filter(user=request.user).first()
+                form.user_info = user_info
                 form.save()
             return redirect('user-create-resume-certi')
     else:
@@ -594,59 +647,81 @@ def user_create_resume_skill(request, skill_id=None):
             queryset=SkillInfo.objects.filter(user_info__user_id=request.user),
             prefix='skil'
         )
-    context['is_exist_personal'] = ResumePersonalInfo.objects.filter(user=request.user).exists()
-    context['is_exist_educational'] = ResumeEducationInfo.objects.filter(user_info__user_id=request.user).exists()
-    context['is_exist_professional'] = ProfessionalExperienceInfo.objects.filter(user_info__user_id=request.user).exists()
-    context['is_exist_skills'] = resume_skill_exist
-    context['is_exist_certi'] = CertificateInfo.objects.filter(user_info__user_id=request.user).exists()
+    context.update(progress)
     context['skill_instance'] = skill_instance
     context['skill_info_form'] = formset_skill
-    context['user_info'] = ResumePersonalInfo.objects.filter(user_id=request.user.id).first()
+    context['user_info'] = user_info
     return render(request, "user-create-resume-skill.html", context)
 
 
+def insert_resume_rows(request, form_class, fields):
+    # fields maps the form fields to the posted names, row n of a section is posted as <name>_<n>.
+    # The batch is all or nothing: one invalid row rejects every row, so a client can fix it and post it again
+    resume = get_resume(request)
+    if resume is None:
+        return JsonResponse({'success': False, 'error': 'Add the personal details of the resume first'}, status=400)
+    model = form_class._meta.model
+    first = next(iter(fields.values()))
+    rows = []
+    rejected = []
+    row_number = 0
+    while f'{first}_{row_number}' in request.POST:
+        data = {field: request.POST.get(f'{name}_{row_number}') for field, name in fields.items()}
+        files = {field: request.FILES[f'{name}_{row_number}'] for field, name in fields.items()
+                 if f'{name}_{row_number}' in request.FILES}
+        form = form_class(data, files)
+        if form.is_valid():
+            row = form.save(commit=False)
+            row.user_info = resume
+            rows.append((row, files))
+        else:
+            errors = {field: list(messages) for field, messages in form.errors.items()}
+            rejected.append({'row': row_number, 'errors': errors})
+        row_number += 1
+    if rejected:
+        return JsonResponse({'success': False, 'created': 0, 'rejected': rejected}, status=400)
+
+    # bulk_create skips save() and its signals: the plain-text copy the pre_save receiver keeps is filled here,
+    # uploads are stored before the transaction so the write lock is only held for the INSERT
+    for row, files in rows:
+        if model is ProfessionalExperienceInfo:
+            row.official_description_text = ckeditor_clean(row.official_description or '')
+        for field in files:
+            upload = getattr(row, field)
+            upload.save(upload.name, upload.file, save=False)
+    with transaction.atomic():
+        model.objects.bulk_create([row for row, _ in rows])
+        if rows:
+            # the vectors, skill tags and signature are rebuilt from the whole resume, once covers the batch
+            resume_section_changed(model, resume.id)
+    return JsonResponse({'success': True, 'created': len(rows), 'rejected': []})
+
+
 def user_insert_education_detail(request):
     if request.method == "POST":
-        iterations_num = int((len(request.POST) - 1) / 4)
-        get_user_info_fetch = ResumePersonalInfo.objects.get(user=request.user)
-        for iter_no in range(iterations_num):
-            new_education = ResumeEducationInfo.objects.create(
-                user_info=get_user_info_fetch,
-                degree_category=request.POST.get(f'degreeTitle_{iter_no}'),
-                start_degree=request.POST.get(f'degreeStart_{iter_no}'),
-                end_degree=request.POST.get(f'degreeEnd_{iter_no}'),
-                degree_description=request.POST.get(f'degree_description_{iter_no}')
-            )
-            if request.FILES.get(f'degreeCertificate_{iter_no}'):
-                new_education.degree_image = request.FILES[f'degreeCertificate_{iter_no}']
-                new_education.save()
-        return JsonResponse({'success': True})
+        return insert_resume_rows(request, ApplicantEducationInfoForm, {
+            'degree_category': 'degreeTitle',
+            'start_degree': 'degreeStart',
+            'end_degree': 'degreeEnd',
+            'degree_description': 'degree_description',
+            'degree_image': 'degreeCertificate',
+        })
 
 
 def user_insert_work_detail(request):
     if request.method == "POST":
-        iterations_num = int((len(request.POST) - 1) / 4)
-        get_user_info_fetch = ResumePersonalInfo.objects.get(user=request.user)
-        for iter_no in range(iterations_num):
-            new_experience = ProfessionalExperienceInfo.objects.create(
-                user_info=get_user_info_fetch,
-                company_name=request.POST.get(f'companyTitle_{iter_no}'),
-                job_title=request.POST.get(f'jobTitle_{iter_no}'),
-                start_experience=request.POST.get(f'jobStart_{iter_no}'),
-                end_experience=request.POST.get(f'jobEnd_{iter_no}'),
-                official_description=request.POST.get(f'job_description_{iter_no}')
-            )
-        return JsonResponse({'success': True})
+        return insert_resume_rows(request, ApplicantProfessionalInfoForm, {
+            'company_name': 'companyTitle',
+            'job_title': 'jobTitle',
+            'start_experience': 'jobStart',
+            'end_experience': 'jobEnd',
+            'official_description': 'job_description',
+        })
 
 
 def user_insert_skill_detail(request):
     if request.method == "POST":
-        iterations_num = int((len(request.POST) - 1) / 2)
-        get_user_info_fetch = ResumePersonalInfo.objects.get(user=request.user)
-        for iter_no in range(iterations_num):
-            new_skill = SkillInfo.objects.create(
-                user_info=get_user_info_fetch,
-                skill_type=request.POST.get(f'skillTitle_{iter_no}'),
-                skill_value=request.POST.get(f'skillPercentage_{iter_no}')
-            )
-        return JsonResponse({'success': True})
+        return insert_resume_rows(request, ApplicantSkillInfoForm, {
+            'skill_type': 'skillTitle',
+            'skill_value': 'skillPercentage',
+        })